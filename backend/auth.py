@@ -1,11 +1,17 @@
+import hashlib
+import os
+import time
+import uuid
 import models
 import schemas
 import database
+import revocation
+from caching import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from typing import Optional
+from typing import NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta, UTC
 import bcrypt
 
@@ -16,6 +22,14 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 # --- NEW ---
 # Change this to a complex, random string in a real environment
 ADMIN_REGISTRATION_SECRET = "caliber@1" 
+# bcrypt cost factor for new password hashes; each step doubles the work.
+# Hashes made at another cost are rehashed on the user's next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# How long a worker trusts its cached copy of a user's id, email and admin flag
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", 30))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", 10000))
+# Verified tokens whose decoded claims a worker keeps, each until its `exp`
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
 
 # ... (Password hashing functions are unchanged) ...
 def verify_password(plain_password, hashed_password):
@@ -26,12 +40,31 @@ def verify_password(plain_password, hashed_password):
     except Exception:
         return False
 
-def get_password_hash(password):
+def get_password_hash(password, rounds: Optional[int] = None):
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     hashed_password = bcrypt.hashpw(password_bytes, salt)
     return hashed_password.decode('utf-8')
 
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """The cost factor of a bcrypt hash such as `$2b$12$...`, or None if it is not one."""
+    parts = hashed_password.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def verify_and_update(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """
+    Checks the password and, if it matches a hash made at a cost other than
+    BCRYPT_ROUNDS, also returns a new hash at the configured cost to store.
+    Both run in one call so the pool pays for the rehash only on that login.
+    """
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if hash_rounds(hashed_password) == BCRYPT_ROUNDS:
+        return True, None
+    return True, get_password_hash(plain_password)
+
 # --- JWT Creation (Modified) ---
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -39,7 +72,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(UTC) + expires_delta
     else:
         expire = datetime.now(UTC) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # `jti` names the token for logout; `iat` keeps sub-second precision so a
+    # login right after a revoke-all is not caught by it
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -51,32 +86,129 @@ def get_user(db: Session, email: str):
     """Helper function to get user from database."""
     return db.query(models.User).filter(models.User.email == email).first()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+def update_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> bool:
     """
-    Decodes the token, validates credentials, and fetches the user.
+    Swaps in a rehashed password unless the hash changed in the meantime,
+    e.g. a concurrent login already upgraded it.
     """
-    credentials_exception = HTTPException(
+    updated = db.query(models.User).filter(
+        models.User.id == user_id, models.User.hashed_password == old_hash
+    ).update({models.User.hashed_password: new_hash}, synchronize_session=False)
+    db.commit()
+    return updated == 1
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+# --- Verified-Token Cache ---
+# A client presents the same token on every request for its whole lifetime.
+# Verifying the signature once and remembering the claims until the token
+# expires takes HMAC and python-jose off the per-request path.
+
+class TokenCache(TTLCache):
+    """Bounded LRU of token digest -> verified claims, each kept until the token's `exp`."""
+
+    def __init__(self, max_size: int = AUTH_TOKEN_CACHE_SIZE):
+        # `exp` is a Unix timestamp, so entries expire on the wall clock
+        super().__init__(max_size, clock=time.time)
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        # Keyed by digest so the cache never holds usable bearer tokens
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        return super().get(self.key(token))
+
+    def put(self, token: str, claims: dict) -> None:
+        expires = claims.get("exp")
+        if isinstance(expires, (int, float)):
+            self.set(self.key(token), claims, expires_at=expires)
+
+token_cache = TokenCache()
+
+def decode_token(token: str) -> dict:
+    """The token's verified claims, from the cache when it has been seen before."""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, claims)
+    return claims
+
+def claims_from_token(token: str) -> dict:
+    """
+    Decodes and validates the token, returning its claims. Revocation is
+    checked separately, since confirming a filter hit needs a session.
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id") # <-- Get user_id from token
         if email is None or user_id is None:
-            raise credentials_exception
+            raise credentials_exception()
     except JWTError:
-        raise credentials_exception
-    
-    # Fetch user by ID from token instead of email
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        raise credentials_exception()
+    return payload
+
+async def ensure_not_revoked(db, claims: dict) -> None:
+    if revocation.revocations.might_be_revoked(claims):
+        if await database.run_db(db, revocation.revocations.confirm, claims):
+            raise credentials_exception()
+
+# --- Principal Mode ---
+# Most endpoints only need to know who the caller is and whether they are an
+# admin. `get_current_principal` answers that from the token and a short-lived
+# per-worker cache of user rows, so an authenticated request normally costs no
+# session checkout or query. The cache doubles as the revocation check: a
+# deleted user stops authenticating within AUTH_USER_CACHE_TTL_SECONDS.
+
+class Principal(NamedTuple):
+    """The authenticated caller, without the rest of the User row."""
+    id: int
+    email: str
+    is_admin: bool
+
+class PrincipalCache(TTLCache):
+    """Bounded LRU of user id -> Principal; entries are trusted for `ttl` seconds."""
+
+    def __init__(self, max_size: int = AUTH_USER_CACHE_SIZE, ttl: float = AUTH_USER_CACHE_TTL_SECONDS):
+        super().__init__(max_size, ttl)
+
+    def put(self, principal: Principal) -> None:
+        self.set(principal.id, principal)
+
+    def invalidate(self, user_id: int) -> None:
+        self.delete(user_id)
+
+principal_cache = PrincipalCache()
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    row = db.query(models.User.id, models.User.email, models.User.is_admin).filter(models.User.id == user_id).first()
+    return Principal(*row) if row is not None else None
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(database.request_db)) -> Principal:
+    """
+    Validates the token and returns its Principal. The session is only used
+    on a cache miss or a revocation filter hit; otherwise the request never
+    touches the database or a worker thread.
+    """
+    claims = claims_from_token(token)
+    await ensure_not_revoked(db, claims)
+    user_id = claims["user_id"]
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = await database.run_db(db, load_principal, user_id)
+        if principal is None:
+            raise credentials_exception()
+        principal_cache.put(principal)
+    return principal
 
 # --- NEW Admin-only Dependency ---
-def get_current_admin_user(current_user: models.User = Depends(get_current_user)):
+def get_current_admin_user(current_user: Principal = Depends(get_current_principal)):
     """
     A dependency that checks if the current user is an admin.
     If not, it raises a 403 Forbidden error.
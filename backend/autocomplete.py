@@ -0,0 +1,117 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+
+# --- Configuration ---
+# Flights added or deleted by other workers show up after a rebuild
+AUTOCOMPLETE_MAX_AGE_SECONDS = int(os.getenv("AUTOCOMPLETE_MAX_AGE_SECONDS", 300))
+
+FIELDS = ("departure", "destination", "airline")
+
+# --- Prefix Index ---
+
+class PrefixIndex:
+    """
+    Sorted array of the distinct values of one column, keyed by their
+    casefolded form, with the number of flights using each value.
+    A prefix lookup is a bisect followed by a scan of the matching range.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, str]] = []
+        self._counts: Dict[str, int] = {}
+
+    def load(self, counts: Dict[str, int]) -> None:
+        self._counts = {value: count for value, count in counts.items() if count > 0}
+        self._keys = sorted((value.casefold(), value) for value in self._counts)
+
+    def add(self, value: str) -> None:
+        if value not in self._counts:
+            bisect.insort(self._keys, (value.casefold(), value))
+            self._counts[value] = 0
+        self._counts[value] += 1
+
+    def remove(self, value: str) -> None:
+        count = self._counts.get(value)
+        if count is None:
+            return
+        if count > 1:
+            self._counts[value] = count - 1
+            return
+        del self._counts[value]
+        i = bisect.bisect_left(self._keys, (value.casefold(), value))
+        if i < len(self._keys) and self._keys[i][1] == value:
+            del self._keys[i]
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Values starting with `prefix` (case-insensitive), most used first."""
+        key = prefix.casefold()
+        start = bisect.bisect_left(self._keys, (key,))
+        matches = []
+        for folded, value in self._keys[start:]:
+            if not folded.startswith(key):
+                break
+            matches.append((value, self._counts[value]))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+class FlightAutocomplete:
+    """One PrefixIndex per autocompletable flight column."""
+
+    def __init__(self, max_age_seconds: int = AUTOCOMPLETE_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._indexes = {field: PrefixIndex() for field in FIELDS}
+        self._loaded_at: Optional[float] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes = {field: PrefixIndex() for field in FIELDS}
+            self._loaded_at = None
+
+    def ensure_loaded(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.max_age_seconds:
+            return
+        indexes = {}
+        for field in FIELDS:
+            column = getattr(models.Flight, field)
+            index = PrefixIndex()
+            index.load(dict(db.query(column, func.count()).group_by(column).all()))
+            indexes[field] = index
+        with self._lock:
+            self._indexes = indexes
+            self._loaded_at = time.monotonic()
+
+    def add_flight(self, flight) -> None:
+        """Counts a new flight; a no-op until the index is loaded."""
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            for field in FIELDS:
+                self._indexes[field].add(getattr(flight, field))
+
+    def remove_flight(self, values: Dict[str, str]) -> None:
+        """Uncounts a deleted flight, given the values captured by `values_of`."""
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            for field in FIELDS:
+                self._indexes[field].remove(values[field])
+
+    def suggest(self, field: str, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        with self._lock:
+            return self._indexes[field].suggest(prefix, limit)
+
+def values_of(flight) -> Dict[str, str]:
+    """Snapshot of the indexed columns, taken before the flight is deleted."""
+    return {field: getattr(flight, field) for field in FIELDS}
+
+flight_autocomplete = FlightAutocomplete()
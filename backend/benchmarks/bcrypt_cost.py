@@ -0,0 +1,81 @@
+"""
+Login latency per bcrypt cost factor on this machine.
+
+For each cost, times hashing a password (registration), verifying it (a
+login) one at a time, and verifying it from --concurrency callers through a
+HashingPool sized like the server's, which is what a login storm sees.
+Use it to pick BCRYPT_ROUNDS. Run from the backend/ folder:
+
+    python benchmarks/bcrypt_cost.py --min-cost 10 --max-cost 14
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import auth
+import hashing
+
+PASSWORD = "correct horse battery staple"
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+async def concurrent_logins(hashed: str, args) -> tuple[list, float]:
+    pool = hashing.HashingPool(workers=args.workers, queue_size=args.concurrency)
+    latencies = []
+
+    async def login():
+        started = time.perf_counter()
+        await pool.run(auth.verify_password, PASSWORD, hashed)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    try:
+        for _ in range(args.iterations):
+            await asyncio.gather(*(login() for _ in range(args.concurrency)))
+    finally:
+        pool.shutdown()
+    return latencies, time.perf_counter() - started
+
+def run_cost(cost: int, args) -> dict:
+    hash_ms = [timed(auth.get_password_hash, PASSWORD, cost) for _ in range(args.iterations)]
+    hashed = auth.get_password_hash(PASSWORD, cost)
+    verify_ms = [timed(auth.verify_password, PASSWORD, hashed) for _ in range(args.iterations)]
+    login_ms, elapsed = asyncio.run(concurrent_logins(hashed, args))
+    return {
+        "hash p50 ms": statistics.median(hash_ms),
+        "verify p50 ms": statistics.median(verify_ms),
+        "login p50 ms": statistics.median(login_ms),
+        "login p99 ms": percentile(login_ms, 0.99),
+        "logins/s": len(login_ms) / elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-cost", type=int, default=10)
+    parser.add_argument("--max-cost", type=int, default=13)
+    parser.add_argument("--iterations", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous logins per round")
+    parser.add_argument("--workers", type=int, default=hashing.PASSWORD_HASH_WORKERS, help="hashing pool size")
+    args = parser.parse_args()
+
+    results = {cost: run_cost(cost, args) for cost in range(args.min_cost, args.max_cost + 1)}
+    columns = list(next(iter(results.values())))
+    print(f"current BCRYPT_ROUNDS={auth.BCRYPT_ROUNDS}, {args.workers} hashing workers")
+    print(f"{'cost':<6}" + "".join(f"{c:>15}" for c in columns))
+    for cost, row in results.items():
+        print(f"{cost:<6}" + "".join(f"{row[c]:>15.1f}" for c in columns))
+
+if __name__ == "__main__":
+    main()
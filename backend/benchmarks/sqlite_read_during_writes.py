@@ -0,0 +1,137 @@
+"""
+Concurrent read throughput on SQLite while bookings are being written.
+
+Compares the stock SQLite setup (rollback journal, one shared pool) with the
+tuned profile from database.py (WAL + pragmas, separate read-only pool).
+Run from the backend/ folder:
+
+    python benchmarks/sqlite_read_during_writes.py --duration 10
+"""
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.orm import sessionmaker
+
+import database
+import inventory
+import models
+
+PROFILES = {
+    # What database.py did before the tuned profile
+    "default": {"journal_mode": "DELETE", "synchronous": "FULL"},
+    "tuned": database.SQLITE_PRAGMAS,
+}
+
+def seed(session_factory, flights: int) -> None:
+    db = session_factory()
+    base = datetime(2030, 1, 1)
+    db.add_all(
+        models.Flight(
+            flight_number=f"BM{i:05d}", airline="Bench Air", departure="AAA", destination="BBB",
+            departure_time=base + timedelta(minutes=i), arrival_time=base + timedelta(minutes=i, hours=2),
+            total_seats=100000, available_seats=100000
+        )
+        for i in range(flights)
+    )
+    db.add(models.User(email="bench@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+
+def run_profile(name: str, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(dir=args.dir), f"{name}.db")
+    url = f"sqlite:///{path}"
+    write_engine = database.create_db_engine(url, sqlite_pragmas=PROFILES[name])
+    # The default profile shares one pool; the tuned one reads from its own
+    read_engine = write_engine if name == "default" else database.create_db_engine(url, read_only=True)
+    WriteSession = sessionmaker(bind=write_engine, autoflush=False)
+    ReadSession = sessionmaker(bind=read_engine, autoflush=False)
+
+    database.Base.metadata.create_all(bind=write_engine)
+    seed(WriteSession, args.flights)
+    inventory.clear_shard_counts()
+
+    stop = threading.Event()
+    passports = itertools.count()
+    read_latencies, writes, errors = [], [], []
+
+    # Pace writers so both profiles serve reads under the same booking load
+    pause = args.writers / args.write_rate if args.write_rate else 0
+
+    def writer():
+        while not stop.wait(pause):
+            db = WriteSession()
+            try:
+                flight_id = next(passports) % args.flights + 1
+                inventory.take_seats(db, flight_id)
+                db.add(models.Booking(
+                    passenger_name="Bench", passport_number=f"P{next(passports):08d}",
+                    flight_id=flight_id, user_id=1, status="Booked"
+                ))
+                db.commit()
+                writes.append(1)
+            except Exception as e:
+                db.rollback()
+                errors.append(e)
+            finally:
+                db.close()
+
+    def reader():
+        while not stop.is_set():
+            db = ReadSession()
+            started = time.perf_counter()
+            try:
+                db.query(models.Flight).order_by(models.Flight.departure_time, models.Flight.id).limit(100).all()
+                read_latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    latencies_ms = sorted(l * 1000 for l in read_latencies) or [0.0]
+    return {
+        "reads/s": len(read_latencies) / args.duration,
+        "read p50 ms": statistics.median(latencies_ms),
+        "read p99 ms": latencies_ms[int(len(latencies_ms) * 0.99) - 1] if len(latencies_ms) > 1 else latencies_ms[0],
+        "writes/s": len(writes) / args.duration,
+        "errors": len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per profile")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--write-rate", type=float, default=100.0,
+                        help="target bookings per second across all writers (0 = as fast as possible)")
+    parser.add_argument("--flights", type=int, default=500)
+    parser.add_argument("--dir", default=None, help="where to create the databases (use a real disk, not tmpfs)")
+    args = parser.parse_args()
+
+    results = {name: run_profile(name, args) for name in PROFILES}
+    columns = list(next(iter(results.values())))
+    print(f"{'profile':<10}" + "".join(f"{c:>14}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:<10}" + "".join(f"{row[c]:>14.1f}" for c in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import etags
+import schemas
+
+# --- Configuration ---
+# "local" keeps a per-worker LRU; "redis" shares one cache between workers
+FLIGHT_CACHE_BACKEND = os.getenv("FLIGHT_CACHE_BACKEND", "local")
+FLIGHT_CACHE_SIZE = int(os.getenv("FLIGHT_CACHE_SIZE", 1024))
+# Bounds staleness when another worker's write cannot invalidate this cache
+FLIGHT_CACHE_TTL_SECONDS = int(os.getenv("FLIGHT_CACHE_TTL_SECONDS", 30))
+FLIGHT_CACHE_REDIS_URL = os.getenv("FLIGHT_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# --- TTL Cache ---
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU whose entries expire. An entry lives `ttl`
+    seconds from when it is set, or until an explicit `expires_at` on
+    `clock`'s timeline (e.g. a token's `exp` with `clock=time.time`).
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        if expires_at is None:
+            expires_at = self.clock() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# --- Backends ---
+# A backend stores serialized flights (ETag + FlightResponse JSON) under string keys.
+
+class LocalCacheBackend(TTLCache):
+    """Bounded in-process LRU; `set` takes each entry's TTL."""
+
+    def __init__(self, max_size: int = FLIGHT_CACHE_SIZE):
+        super().__init__(max_size)
+
+class RedisCacheBackend:
+    """Shared cache for multi-worker deployments. Requires the `redis` package."""
+
+    def __init__(self, url: str = FLIGHT_CACHE_REDIS_URL, prefix: str = "flight:"):
+        import redis  # Optional dependency, only needed for this backend
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._redis.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self._redis.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        keys = list(self._redis.scan_iter(self.prefix + "*"))
+        if keys:
+            self._redis.delete(*keys)
+
+BACKENDS = {"local": LocalCacheBackend, "redis": RedisCacheBackend}
+
+# --- Flight Cache ---
+
+class CachedFlight(NamedTuple):
+    etag: str
+    body: str
+
+    def dumps(self) -> str:
+        return f"{self.etag}\n{self.body}"
+
+    @classmethod
+    def loads(cls, value: str) -> "CachedFlight":
+        return cls(*value.split("\n", 1))
+
+class FlightCache:
+    """Read-through cache of serialized flights, keyed by flight id."""
+
+    def __init__(self, backend, ttl: int = FLIGHT_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, flight_id: int) -> Optional[CachedFlight]:
+        value = self.backend.get(str(flight_id))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return CachedFlight.loads(value) if value is not None else None
+
+    def put(self, flight, available_seats: Optional[int] = None) -> CachedFlight:
+        """
+        Caches the flight. `available_seats` overrides the row's count, for
+        sharded flights whose bookings do not bump `version`.
+        """
+        response = schemas.FlightResponse.model_validate(flight)
+        etag_parts = ("flight", flight.id, flight.version)
+        if available_seats is not None and available_seats != response.available_seats:
+            response = response.model_copy(update={"available_seats": available_seats})
+            etag_parts += (available_seats,)
+        cached = CachedFlight(etags.make_etag(*etag_parts), response.model_dump_json())
+        self.backend.set(str(flight.id), cached.dumps(), self.ttl)
+        return cached
+
+    def invalidate(self, flight_id: int) -> None:
+        self.backend.delete(str(flight_id))
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+flight_cache = FlightCache(BACKENDS[FLIGHT_CACHE_BACKEND]())
+
+# --- Write Invalidation ---
+# Writers mark the flights they change on their session; the cache entries
+# are dropped only once the transaction commits, so a rolled-back booking
+# never evicts anything. A read that races a commit can still re-cache the
+# old row; the TTL bounds how long that lasts.
+
+_DIRTY_KEY = "flight_cache_dirty"
+
+def mark_dirty(db: Session, flight_id: int) -> None:
+    db.info.setdefault(_DIRTY_KEY, set()).add(flight_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for flight_id in session.info.pop(_DIRTY_KEY, ()):
+        flight_cache.invalidate(flight_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
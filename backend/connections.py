@@ -0,0 +1,149 @@
+import bisect
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AbstractSet, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+
+# --- Configuration ---
+# Other workers' add_flight/delete_flight calls are only seen after a rebuild
+CONNECTION_GRAPH_MAX_AGE_SECONDS = int(os.getenv("CONNECTION_GRAPH_MAX_AGE_SECONDS", 300))
+# Upper bound on partial itineraries explored per search
+CONNECTION_SEARCH_MAX_EXPANSIONS = int(os.getenv("CONNECTION_SEARCH_MAX_EXPANSIONS", 20000))
+
+class Leg(NamedTuple):
+    flight_id: int
+    departure: str
+    destination: str
+    departure_time: datetime
+    arrival_time: datetime
+
+    @classmethod
+    def from_flight(cls, flight) -> "Leg":
+        return cls(flight.id, flight.departure, flight.destination, flight.departure_time, flight.arrival_time)
+
+# --- Time-Expanded Flight Graph ---
+
+class FlightGraph:
+    """
+    In-memory departures board: for every airport, the flights leaving it
+    sorted by departure time, so "what leaves X between t1 and t2" is a
+    bisect instead of a query. Kept current by add_flight/delete_flight and
+    rebuilt from the database when older than `max_age_seconds`. Seat counts
+    change far too often to be tracked here; callers check them afterwards.
+    """
+
+    def __init__(self, max_age_seconds: int = CONNECTION_GRAPH_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._departures: Dict[str, List[Tuple[datetime, int]]] = {}
+        self._legs: Dict[int, Leg] = {}
+        self._loaded_at: Optional[float] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._departures = {}
+            self._legs = {}
+            self._loaded_at = None
+
+    def ensure_loaded(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.max_age_seconds:
+            return
+        rows = db.query(
+            models.Flight.id, models.Flight.departure, models.Flight.destination,
+            models.Flight.departure_time, models.Flight.arrival_time
+        ).all()
+        legs = {row.id: Leg(*row) for row in rows}
+        departures = defaultdict(list)
+        for leg in legs.values():
+            departures[leg.departure].append((leg.departure_time, leg.flight_id))
+        for board in departures.values():
+            board.sort()
+        with self._lock:
+            self._legs = legs
+            self._departures = dict(departures)
+            self._loaded_at = time.monotonic()
+
+    def add_flight(self, flight) -> None:
+        """Adds (or refreshes) one flight; a no-op until the graph is loaded."""
+        if self._loaded_at is None:
+            return
+        self.remove_flight(flight.id)
+        leg = Leg.from_flight(flight)
+        with self._lock:
+            self._legs[leg.flight_id] = leg
+            bisect.insort(self._departures.setdefault(leg.departure, []), (leg.departure_time, leg.flight_id))
+
+    def remove_flight(self, flight_id: int) -> None:
+        with self._lock:
+            leg = self._legs.pop(flight_id, None)
+            if leg is None:
+                return
+            board = self._departures.get(leg.departure, [])
+            i = bisect.bisect_left(board, (leg.departure_time, leg.flight_id))
+            if i < len(board) and board[i] == (leg.departure_time, leg.flight_id):
+                del board[i]
+
+    def _leaving(self, airport: str, earliest: datetime, latest: datetime) -> List[Leg]:
+        board = self._departures.get(airport, [])
+        start = bisect.bisect_left(board, (earliest, -1))
+        end = bisect.bisect_right(board, (latest, float("inf")))
+        return [self._legs[flight_id] for _, flight_id in board[start:end]]
+
+    def search(
+        self,
+        departure: str,
+        destination: str,
+        earliest_departure: datetime,
+        latest_departure: datetime,
+        max_legs: int,
+        min_connection: timedelta,
+        max_connection: timedelta,
+        limit: int,
+        exclude: AbstractSet[int] = frozenset(),
+    ) -> List[Tuple[Leg, ...]]:
+        """
+        Earliest-arrival search over the time-expanded graph. Partial
+        itineraries are expanded in order of arrival time, so complete ones
+        come out already ranked (earliest arrival first, then fewest legs).
+        Each airport is settled at most `limit` times, which is enough to
+        produce the best `limit` itineraries. Flights in `exclude` (known to
+        be full) are skipped.
+        """
+        with self._lock:
+            results: List[Tuple[Leg, ...]] = []
+            settled: Dict[str, int] = defaultdict(int)
+            tie = itertools.count()
+            heap = []
+            for leg in self._leaving(departure, earliest_departure, latest_departure):
+                if leg.flight_id not in exclude and leg.destination != departure:
+                    heapq.heappush(heap, (leg.arrival_time, 1, next(tie), (leg,)))
+
+            expansions = 0
+            while heap and len(results) < limit and expansions < CONNECTION_SEARCH_MAX_EXPANSIONS:
+                arrival, legs_used, _, path = heapq.heappop(heap)
+                expansions += 1
+                airport = path[-1].destination
+                if airport == destination:
+                    results.append(path)
+                    continue
+                if legs_used == max_legs or settled[airport] >= limit:
+                    continue
+                settled[airport] += 1
+
+                visited = {departure, *(leg.destination for leg in path)}
+                for leg in self._leaving(airport, arrival + min_connection, arrival + max_connection):
+                    if leg.destination in visited or leg.flight_id in exclude:
+                        continue
+                    heapq.heappush(heap, (leg.arrival_time, legs_used + 1, next(tie), path + (leg,)))
+            return results
+
+flight_graph = FlightGraph()
@@ -0,0 +1,44 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+# --- ETags ---
+# Flights carry a `version` bumped with every seat change and users a
+# `bookings_version` bumped with every change to their bookings, so a
+# read can work out its ETag from versions alone and answer 304 before
+# loading or serializing any rows.
+
+ETAG_HEADER = "ETag"
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag, **(headers or {})})
+
+def bump_bookings_version(db: Session, user_id: int) -> None:
+    # The user's next reads must see this change even if replicas lag
+    database.stick_to_primary(db, user_id)
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {models.User.bookings_version: models.User.bookings_version + 1}, synchronize_session=False
+    )
+
+def bump_bookings_versions_for_flight(db: Session, flight_id: int) -> None:
+    """Bumps every user with a booking on the flight, e.g. before it is deleted."""
+    owners = db.query(models.Booking.user_id).filter(models.Booking.flight_id == flight_id)
+    db.query(models.User).filter(models.User.id.in_(owners.scalar_subquery())).update(
+        {models.User.bookings_version: models.User.bookings_version + 1}, synchronize_session=False
+    )
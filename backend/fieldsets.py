@@ -0,0 +1,53 @@
+from typing import Any, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+# --- Sparse Fieldsets ---
+# `fields=id,flight_number,available_seats` narrows a read to those attributes
+# of the response schema: only their columns are selected and only they are
+# serialized. Sparse responses skip response-model validation, since
+# the omitted fields are required in the full schema.
+
+FIELDS_QUERY = Query(
+    None, description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`."
+)
+
+def parse(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Splits a `fields` value into the schema fields it names, in order and
+    without duplicates. None means the full representation. Raises 400 for
+    names the schema does not have.
+    """
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in schema.model_fields]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields {unknown}; choose from {list(schema.model_fields)}",
+        )
+    return names
+
+def columns(model, names: Tuple[str, ...]):
+    """A loader option selecting only the columns among `names` (plus the primary key)."""
+    mapper = inspect(model)
+    # Naming the key keeps load_only non-empty when only relationships were asked for
+    keys = [column.key for column in mapper.primary_key]
+    keys += [name for name in names if name in mapper.column_attrs.keys() and name not in keys]
+    return load_only(*[getattr(model, key) for key in keys])
+
+def project(obj: Any, names: Tuple[str, ...], schema: Type[BaseModel]) -> dict:
+    """The `names` attributes of an ORM object, nested objects serialized with their schema."""
+    item = {}
+    for name in names:
+        value = getattr(obj, name)
+        annotation = schema.model_fields[name].annotation
+        if value is not None and isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            value = annotation.model_validate(value)
+        item[name] = value
+    return jsonable_encoder(item)
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+# --- Configuration ---
+# bcrypt releases the GIL, so threads hash in parallel; "process" isolates
+# the work completely at the cost of pickling each call
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Hash requests allowed to wait for a worker; beyond that login and
+# registration answer 503 instead of queueing without bound
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+T = TypeVar("T")
+
+# --- Hashing Pool ---
+# Password hashing is deliberately slow. On FastAPI's shared threadpool a
+# login storm would hold every thread and starve booking and listing
+# requests, so hashing gets its own small pool with a bounded backlog.
+
+class HashingPool:
+    """A dedicated executor for password hashing with a queue-depth limit."""
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        queue_size: int = PASSWORD_HASH_QUEUE_SIZE,
+        kind: str = PASSWORD_HASH_POOL,
+    ):
+        if kind not in EXECUTORS:
+            raise ValueError(f"Unknown password hash pool {kind!r}, expected one of {list(EXECUTORS)}")
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app spawns no workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = EXECUTORS[self.kind](max_workers=self.workers)
+            return self._executor
+
+    def _done(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Runs `fn(*args)` on the pool. Raises 503 when `max_pending` calls are
+        already running or queued. A call stays counted until it finishes,
+        even if the request that made it goes away.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-ins in progress, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+password_pool = HashingPool()
@@ -0,0 +1,109 @@
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import database
+import models
+import inventory
+import schemas
+import waitlist
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SEAT_HOLD_TTL_SECONDS = int(os.getenv("SEAT_HOLD_TTL_SECONDS", 600))
+# Set to 0 to disable the background sweeper (expired holds are still
+# rejected on confirm, their seats just stay held until the next sweep).
+SEAT_HOLD_SWEEP_SECONDS = int(os.getenv("SEAT_HOLD_SWEEP_SECONDS", 15))
+
+utcnow = database.utcnow
+
+def hold_expiry() -> datetime:
+    return utcnow() + timedelta(seconds=SEAT_HOLD_TTL_SECONDS)
+
+def transition_hold(db: Session, hold_id: int, new_status: str, **values) -> bool:
+    """
+    Moves an active hold to `new_status` with a guarded UPDATE.
+    Returns False if the hold was already confirmed, released or expired.
+    """
+    updated = db.query(models.SeatHold).filter(
+        models.SeatHold.id == hold_id,
+        models.SeatHold.status == "Held"
+    ).update({"status": new_status, **values}, synchronize_session=False)
+    return updated > 0
+
+def release_expired_holds(db: Session, now: datetime = None, promoted: Optional[list] = None) -> int:
+    """
+    Expires every hold past its deadline. Freed seats go to the head of the
+    flight's waitlist first, like a cancelled booking's; the rest return to
+    the flight with one UPDATE. Returns the number of seats freed and adds
+    the waitlist bookings made to `promoted`, if given.
+    """
+    now = now or utcnow()
+    expired = db.query(models.SeatHold.id, models.SeatHold.flight_id).filter(
+        models.SeatHold.status == "Held",
+        models.SeatHold.expires_at <= now
+    ).all()
+
+    holds_by_flight = defaultdict(list)
+    for hold_id, flight_id in expired:
+        holds_by_flight[flight_id].append(hold_id)
+
+    released = 0
+    for flight_id, hold_ids in holds_by_flight.items():
+        # Re-check the status so a hold confirmed in the meantime keeps its seat
+        count = db.query(models.SeatHold).filter(
+            models.SeatHold.id.in_(hold_ids),
+            models.SeatHold.status == "Held"
+        ).update({"status": "Expired"}, synchronize_session=False)
+        if not count:
+            continue
+        returned = count
+        while returned:
+            booking = waitlist.promote_next(db, flight_id)
+            if booking is None:
+                break
+            returned -= 1
+            if promoted is not None:
+                promoted.append(booking)
+        if returned:
+            inventory.release_seats(db, flight_id, returned)
+        released += count
+    db.commit()
+    return released
+
+# Recipient and booking of a waitlist promotion, for its confirmation email
+Promotion = Tuple[str, schemas.BookingResponse]
+
+def _sweep(db: Session) -> Tuple[int, List[Promotion]]:
+    promoted = []
+    released = release_expired_holds(db, promoted=promoted)
+    # Serialized while the session is open, since the emails go out after it closes
+    return released, [(b.owner.email, schemas.BookingResponse.model_validate(b)) for b in promoted]
+
+async def run_hold_sweeper(
+    session_factory,
+    interval: int = SEAT_HOLD_SWEEP_SECONDS,
+    notify_promoted: Optional[Callable[[str, schemas.BookingResponse], Awaitable[None]]] = None,
+):
+    """
+    Background task that periodically releases expired holds, calling
+    `notify_promoted` for each waitlisted passenger who got a freed seat.
+    """
+    async def report(result: Tuple[int, List[Promotion]]) -> None:
+        released, promotions = result
+        if released:
+            logger.info("Released %d seats from expired holds", released)
+        if notify_promoted is None:
+            return
+        for email, booking in promotions:
+            try:
+                await notify_promoted(email, booking)
+            except Exception:
+                logger.exception("Could not notify waitlist promotion for booking %s", booking.id)
+
+    await database.run_periodically(session_factory, _sweep, interval, "Seat hold sweep", on_result=report)
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 4096))
+# How long a key replays its response; after that it counts as new
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+# How often expired records are deleted (0 disables the sweeper; expired
+# keys are still ignored, their rows just stay until the next sweep)
+IDEMPOTENCY_SWEEP_SECONDS = int(os.getenv("IDEMPOTENCY_SWEEP_SECONDS", 3600))
+
+# --- Idempotency Store ---
+# Records live in the `idempotency_keys` table, written in the same
+# transaction as the change they describe. A bounded LRU in front of the
+# table lets repeated retries replay without a database round trip.
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: str
+    created_at: datetime
+
+_recent: "OrderedDict[Tuple[int, str], StoredResponse]" = OrderedDict()
+_lock = threading.Lock()
+
+def _remember_locally(cache_key: Tuple[int, str], stored: StoredResponse) -> None:
+    with _lock:
+        _recent[cache_key] = stored
+        _recent.move_to_end(cache_key)
+        while len(_recent) > IDEMPOTENCY_CACHE_SIZE:
+            _recent.popitem(last=False)
+
+def clear() -> None:
+    with _lock:
+        _recent.clear()
+
+def expiry_cutoff() -> datetime:
+    """Records created at or before this have expired."""
+    return database.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+
+def request_hash(method: str, path: str, payload: Optional[BaseModel] = None) -> str:
+    body = payload.model_dump_json() if payload is not None else ""
+    return hashlib.sha256(f"{method} {path}\n{body}".encode("utf-8")).hexdigest()
+
+def lookup(db: Session, user_id: int, key: str) -> Optional[StoredResponse]:
+    cache_key = (user_id, key)
+    cutoff = expiry_cutoff()
+    with _lock:
+        stored = _recent.get(cache_key)
+        if stored is not None and stored.created_at > cutoff:
+            _recent.move_to_end(cache_key)
+            return stored
+        _recent.pop(cache_key, None)
+
+    record = db.query(models.IdempotencyRecord).filter(
+        models.IdempotencyRecord.user_id == user_id,
+        models.IdempotencyRecord.key == key,
+        models.IdempotencyRecord.created_at > cutoff
+    ).first()
+    if record is None:
+        return None
+    stored = StoredResponse(record.request_hash, record.status_code, record.response_body, record.created_at)
+    _remember_locally(cache_key, stored)
+    return stored
+
+def replay(db: Session, user_id: int, key: str, req_hash: str) -> Optional[Response]:
+    """
+    Returns the stored response for `key`, or None if the key is new.
+    Raises 422 if the key was already used for a different request.
+    """
+    stored = lookup(db, user_id, key)
+    if stored is None:
+        return None
+    if stored.request_hash != req_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+def record(db: Session, user_id: int, key: str, req_hash: str, status_code: int, body: BaseModel) -> None:
+    """Adds the response to the caller's transaction; it is stored on commit."""
+    # An expired record of the same key would collide with the new one
+    db.query(models.IdempotencyRecord).filter(
+        models.IdempotencyRecord.user_id == user_id,
+        models.IdempotencyRecord.key == key,
+        models.IdempotencyRecord.created_at <= expiry_cutoff()
+    ).delete(synchronize_session=False)
+    db.add(models.IdempotencyRecord(
+        user_id=user_id,
+        key=key,
+        request_hash=req_hash,
+        status_code=status_code,
+        response_body=body.model_dump_json(),
+        created_at=database.utcnow()
+    ))
+
+def prune_expired(db: Session) -> int:
+    deleted = db.query(models.IdempotencyRecord).filter(
+        models.IdempotencyRecord.created_at <= expiry_cutoff()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+async def run_idempotency_sweeper(session_factory, interval: int = IDEMPOTENCY_SWEEP_SECONDS):
+    """Background task that periodically deletes expired idempotency records."""
+    async def report(deleted: int) -> None:
+        if deleted:
+            logger.info("Deleted %d expired idempotency records", deleted)
+
+    await database.run_periodically(
+        session_factory, prune_expired, interval, "Idempotency record sweep", on_result=report
+    )
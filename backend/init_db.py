@@ -1,3 +1,5 @@
+from sqlalchemy import inspect, text
+
 from database import engine, Base
 
 # --- IMPORT ALL MODELS HERE ---
@@ -5,10 +7,36 @@ from database import engine, Base
 # we ensure they register themselves with the 'Base' metadata.
 import models 
 
+# Columns added to existing tables after their first release, as
+# (table, column, DDL type and default). create_all() never alters a table,
+# so databases created earlier get them here.
+ADDED_COLUMNS = [
+    ("flights", "seat_shards", "INTEGER NOT NULL DEFAULT 1"),
+    ("flights", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ("users", "bookings_version", "INTEGER NOT NULL DEFAULT 1"),
+]
+
+def add_missing_columns():
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if column not in {c["name"] for c in existing.get_columns(table)}:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                print(f"Added column {table}.{column}.")
+
 print("Initializing database...")
 try:
     # This will now create all tables, including 'users'
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully.")
+
+    add_missing_columns()
+
+    # create_all() skips tables that already exist, so indexes added to an
+    # existing table later on (like the flights route index) are created here.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    print("Database indexes are up to date.")
 except Exception as e:
     print(f"An error occurred: {e}")
\ No newline at end of file
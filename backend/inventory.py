@@ -0,0 +1,202 @@
+import os
+import random
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import caching
+import database
+import models
+
+# --- Configuration ---
+# How often sharded flights fold their shard totals back into
+# `flights.available_seats` (0 disables the background compactor).
+SEAT_SHARD_COMPACT_SECONDS = int(os.getenv("SEAT_SHARD_COMPACT_SECONDS", 5))
+
+# --- Seat Inventory ---
+# All changes to seat counts go through these helpers so that every path
+# (bookings, holds, cancellations) uses the same guarded UPDATEs. Callers
+# must roll back their transaction when `take_seats` returns False.
+
+# flight_id -> seat_shards. A flight's shard count never changes after it is
+# created, but databases made before `sqlite_autoincrement` can hand a deleted
+# flight's id to a new one, and only the deleting worker forgets it. So every
+# UPDATE also checks the row is laid out as the cached count says; when it
+# matches nothing, the count is re-read and the UPDATE retried once.
+_shard_counts: Dict[int, int] = {}
+
+def shard_count(db: Session, flight_id: int) -> Optional[int]:
+    """Returns the flight's shard count, or None if the flight does not exist."""
+    if flight_id not in _shard_counts:
+        row = db.query(models.Flight.seat_shards).filter(models.Flight.id == flight_id).first()
+        if row is None:
+            return None
+        _shard_counts[flight_id] = row.seat_shards
+    return _shard_counts[flight_id]
+
+def _reread_shard_count(db: Session, flight_id: int, stale: int) -> Optional[int]:
+    """The flight's current shard count if it differs from `stale`, else None."""
+    _shard_counts.pop(flight_id, None)
+    shards = shard_count(db, flight_id)
+    return shards if shards is not None and shards != stale else None
+
+def forget_flight(flight_id: int) -> None:
+    _shard_counts.pop(flight_id, None)
+
+def clear_shard_counts() -> None:
+    _shard_counts.clear()
+
+def live_available_seats(db: Session, flight: models.Flight) -> int:
+    """
+    Seats left on the flight right now. Sharded flights sum their counters,
+    since `available_seats` only catches up when the compactor runs.
+    """
+    if flight.seat_shards <= 1:
+        return flight.available_seats
+    total = db.query(func.sum(models.FlightSeatShard.available_seats)).filter(
+        models.FlightSeatShard.flight_id == flight.id
+    ).scalar()
+    return total or 0
+
+def split_into_shards(total_seats: int, shards: int) -> List[models.FlightSeatShard]:
+    """Spreads `total_seats` as evenly as possible over `shards` counter rows."""
+    base, extra = divmod(total_seats, shards)
+    return [
+        models.FlightSeatShard(shard=i, available_seats=base + (1 if i < extra else 0))
+        for i in range(shards)
+    ]
+
+def _take_from_shard(db: Session, flight_id: int, shard: int, count: int) -> bool:
+    claimed = db.query(models.FlightSeatShard).filter(
+        models.FlightSeatShard.flight_id == flight_id,
+        models.FlightSeatShard.shard == shard,
+        models.FlightSeatShard.available_seats >= count
+    ).update(
+        {models.FlightSeatShard.available_seats: models.FlightSeatShard.available_seats - count},
+        synchronize_session=False
+    )
+    return claimed > 0
+
+def _take_sharded(db: Session, flight_id: int, shards: int, count: int) -> bool:
+    if count == 1:
+        # Start at a random shard so concurrent bookings land on different rows
+        start = random.randrange(shards)
+        return any(
+            _take_from_shard(db, flight_id, (start + i) % shards, 1)
+            for i in range(shards)
+        )
+
+    # Multi-seat claims read the shards once and drain the fullest first
+    rows = db.query(models.FlightSeatShard.shard, models.FlightSeatShard.available_seats).filter(
+        models.FlightSeatShard.flight_id == flight_id,
+        models.FlightSeatShard.available_seats > 0
+    ).order_by(models.FlightSeatShard.available_seats.desc()).all()
+    remaining = count
+    for shard, available in rows:
+        take = min(available, remaining)
+        if not _take_from_shard(db, flight_id, shard, take):
+            return False
+        remaining -= take
+        if remaining == 0:
+            return True
+    return False
+
+def take_seats(db: Session, flight_id: int, count: int = 1) -> bool:
+    """
+    Atomically claims `count` seats on a flight.
+    Returns False if the flight does not exist or has too few seats left.
+    """
+    shards = shard_count(db, flight_id)
+    if shards is None:
+        return False
+    caching.mark_dirty(db, flight_id)
+    if _take(db, flight_id, shards, count):
+        return True
+    # Sold out, or the cached shard count belongs to an earlier flight with this id
+    fresh = _reread_shard_count(db, flight_id, shards)
+    return fresh is not None and _take(db, flight_id, fresh, count)
+
+def _take(db: Session, flight_id: int, shards: int, count: int) -> bool:
+    if shards > 1:
+        return _take_sharded(db, flight_id, shards, count)
+
+    claimed = db.query(models.Flight).filter(
+        models.Flight.id == flight_id,
+        models.Flight.seat_shards == 1,
+        models.Flight.available_seats >= count
+    ).update(
+        {
+            models.Flight.available_seats: models.Flight.available_seats - count,
+            models.Flight.version: models.Flight.version + 1,
+        },
+        synchronize_session=False
+    )
+    return claimed > 0
+
+def release_seats(db: Session, flight_id: int, count: int = 1) -> None:
+    """Returns `count` seats to a flight in place."""
+    shards = shard_count(db, flight_id)
+    if shards is None:
+        return
+    caching.mark_dirty(db, flight_id)
+    if not _release(db, flight_id, shards, count):
+        fresh = _reread_shard_count(db, flight_id, shards)
+        if fresh is not None:
+            _release(db, flight_id, fresh, count)
+
+def _release(db: Session, flight_id: int, shards: int, count: int) -> bool:
+    if shards > 1:
+        return db.query(models.FlightSeatShard).filter(
+            models.FlightSeatShard.flight_id == flight_id,
+            models.FlightSeatShard.shard == random.randrange(shards)
+        ).update(
+            {models.FlightSeatShard.available_seats: models.FlightSeatShard.available_seats + count},
+            synchronize_session=False
+        ) > 0
+
+    return db.query(models.Flight).filter(
+        models.Flight.id == flight_id,
+        models.Flight.seat_shards == 1
+    ).update(
+        {
+            models.Flight.available_seats: models.Flight.available_seats + count,
+            models.Flight.version: models.Flight.version + 1,
+        },
+        synchronize_session=False
+    ) > 0
+
+def flight_exists(db: Session, flight_id: int) -> bool:
+    return shard_count(db, flight_id) is not None
+
+# --- Shard Compaction ---
+
+def compact_seat_shards(db: Session) -> int:
+    """
+    Writes the sum of each sharded flight's counters into
+    `flights.available_seats`. Returns the number of flights updated.
+    """
+    totals = db.query(
+        models.FlightSeatShard.flight_id,
+        func.sum(models.FlightSeatShard.available_seats)
+    ).group_by(models.FlightSeatShard.flight_id).all()
+
+    updated = 0
+    for flight_id, total in totals:
+        # Skip the write entirely when nothing changed since the last pass
+        changed = db.query(models.Flight).filter(
+            models.Flight.id == flight_id,
+            models.Flight.available_seats != total
+        ).update(
+            {models.Flight.available_seats: total, models.Flight.version: models.Flight.version + 1},
+            synchronize_session=False
+        )
+        if changed:
+            caching.mark_dirty(db, flight_id)
+        updated += changed
+    db.commit()
+    return updated
+
+async def run_shard_compactor(session_factory, interval: int = SEAT_SHARD_COMPACT_SECONDS):
+    """Background task that periodically compacts sharded seat counters."""
+    await database.run_periodically(session_factory, compact_seat_shards, interval, "Seat shard compaction")
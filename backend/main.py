@@ -1,9 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Response, BackgroundTasks # Make sure BackgroundTasks is imported
+from fastapi import FastAPI, Depends, HTTPException, status, Response, BackgroundTasks, Body, Header, Query # Make sure BackgroundTasks is imported
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session, joinedload
+from typing import Dict, List, Literal, Optional, Set, Union
+from typing_extensions import Annotated
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+import asyncio
 from pydantic import EmailStr
+import json
 import os
 from dotenv import load_dotenv
 
@@ -14,6 +20,19 @@ import models
 import schemas
 import database
 import auth
+import inventory
+import holds
+import idempotency
+import waitlist
+import pagination
+import connections
+import autocomplete
+import caching
+import etags
+import singleflight
+import fieldsets
+import hashing
+import revocation
 
 # --- Load .env file for email ---
 load_dotenv()
@@ -31,16 +50,41 @@ conf = ConnectionConfig(
     VALIDATE_CERTS=True
 )
 
+# --- Background tasks that live as long as the app ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if holds.SEAT_HOLD_SWEEP_SECONDS > 0:
+        tasks.append(asyncio.create_task(holds.run_hold_sweeper(
+            database.SessionLocal, notify_promoted=send_waitlist_promotion_email
+        )))
+    if inventory.SEAT_SHARD_COMPACT_SECONDS > 0:
+        tasks.append(asyncio.create_task(inventory.run_shard_compactor(database.SessionLocal)))
+    if idempotency.IDEMPOTENCY_SWEEP_SECONDS > 0:
+        tasks.append(asyncio.create_task(idempotency.run_idempotency_sweeper(database.SessionLocal)))
+    revocation.revocations.start()
+    if revocation.REVOCATION_SYNC_SECONDS > 0:
+        tasks.append(asyncio.create_task(revocation.run_revocation_sync(database.SessionLocal)))
+    if revocation.REVOCATION_PRUNE_SECONDS > 0:
+        tasks.append(asyncio.create_task(revocation.run_revocation_pruner(database.SessionLocal)))
+    yield
+    for task in tasks:
+        task.cancel()
+    revocation.revocations.stop()
+    hashing.password_pool.shutdown()
+
 app = FastAPI(
     title="Flight Booking API",
     description="API for booking and managing flight tickets.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-get_db = database.get_db
+get_db = database.request_db
+get_read_db = database.request_read_db
 
 # --- Helper to send confirmation email ---
-async def send_booking_confirmation(email_to: EmailStr, booking: models.Booking):
+async def send_booking_confirmation(email_to: EmailStr, booking: schemas.BookingResponse):
     flight = booking.flight
     html = f"""
     <p>Hi {booking.passenger_name},</p>
@@ -65,8 +109,39 @@ async def send_booking_confirmation(email_to: EmailStr, booking: models.Booking)
     fm = FastMail(conf)
     await fm.send_message(message)
 
+# --- Helper to send one confirmation email for a group booking ---
+async def send_group_booking_confirmation(email_to: EmailStr, bookings: List[schemas.BookingResponse]):
+    flight = bookings[0].flight
+    passengers = "".join(
+        f"<li><b>{booking.passenger_name}</b> (Booking ID: {booking.id})</li>"
+        for booking in bookings
+    )
+    html = f"""
+    <p>Hi,</p>
+    <p>Your group booking for {len(bookings)} passengers is confirmed!</p>
+    <h3>Flight Details</h3>
+    <ul>
+      <li><b>Flight:</b> {flight.airline} - {flight.flight_number}</li>
+      <li><b>From:</b> {flight.departure}</li>
+      <li><b>To:</b> {flight.destination}</li>
+      <li><b>Departure Time:</b> {flight.departure_time}</li>
+      <li><b>Arrival Time:</b> {flight.arrival_time}</li>
+    </ul>
+    <h3>Passengers</h3>
+    <ul>{passengers}</ul>
+    <p>Safe travels!</p>
+    """
+    message = MessageSchema(
+        subject=f"Group Booking Confirmed: {flight.flight_number}",
+        recipients=[email_to],
+        body=html,
+        subtype=MessageType.html
+    )
+    fm = FastMail(conf)
+    await fm.send_message(message)
+
 # --- NEW: Helper to send cancellation email ---
-async def send_cancellation_email(email_to: EmailStr, booking: models.Booking):
+async def send_cancellation_email(email_to: EmailStr, booking: schemas.BookingResponse):
     """
     Sends a booking cancellation email in the background.
     """
@@ -95,35 +170,80 @@ async def send_cancellation_email(email_to: EmailStr, booking: models.Booking):
     await fm.send_message(message)
 
 
+# --- Helper to tell a waitlisted passenger they got a seat ---
+async def send_waitlist_promotion_email(email_to: EmailStr, booking: schemas.BookingResponse):
+    flight = booking.flight
+    html = f"""
+    <p>Hi {booking.passenger_name},</p>
+    <p>Good news! A seat opened up and your waitlisted booking is now confirmed.</p>
+    <h3>Booking Details</h3>
+    <ul>
+      <li><b>Booking ID:</b> {booking.id}</li>
+      <li><b>Flight:</b> {flight.airline} - {flight.flight_number}</li>
+      <li><b>From:</b> {flight.departure}</li>
+      <li><b>To:</b> {flight.destination}</li>
+      <li><b>Departure Time:</b> {flight.departure_time}</li>
+      <li><b>Arrival Time:</b> {flight.arrival_time}</li>
+    </ul>
+    <p>Safe travels!</p>
+    """
+    message = MessageSchema(
+        subject=f"Off the Waitlist: {flight.flight_number}",
+        recipients=[email_to],
+        body=html,
+        subtype=MessageType.html
+    )
+    fm = FastMail(conf)
+    await fm.send_message(message)
+
+
 # --- User and Auth Endpoints (Unchanged) ---
 @app.post("/users/register", response_model=schemas.UserResponse, tags=["Users"])
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    # ... (code is unchanged)
-    db_user = auth.get_user(db, email=user.email)
-    if db_user:
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)) -> schemas.UserResponse:
+    # Rejected registrations are answered before they can take a hashing slot
+    is_admin = check_admin_secret(user)
+    await database.run_db(db, ensure_email_available, user.email)
+    # bcrypt is deliberately slow, so it runs on its own pool, off the event loop
+    hashed_password = await hashing.password_pool.run(auth.get_password_hash, user.password)
+    return await database.run_db(db, create_user, user, hashed_password, is_admin)
+
+def check_admin_secret(user: schemas.UserCreate) -> bool:
+    """Whether the registration is for an admin; raises 400 for a wrong secret."""
+    if not user.admin_secret:
+        return False
+    if user.admin_secret != auth.ADMIN_REGISTRATION_SECRET:
+        raise HTTPException(status_code=400, detail="Invalid admin secret")
+    return True
+
+def ensure_email_available(db: Session, email: str) -> None:
+    if auth.get_user(db, email=email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    is_admin = False
-    if user.admin_secret:
-        if user.admin_secret == auth.ADMIN_REGISTRATION_SECRET:
-            is_admin = True
-        else:
-            raise HTTPException(status_code=400, detail="Invalid admin secret")
-    hashed_password = auth.get_password_hash(user.password)
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str, is_admin: bool) -> schemas.UserResponse:
+    # Checked again, since a concurrent registration may have taken the email while hashing
+    ensure_email_available(db, user.email)
     new_user = models.User(
         email=user.email, 
         hashed_password=hashed_password, 
         is_admin=is_admin
     )
     db.add(new_user)
+    db.flush()
+    # The client logs in and fetches /users/me next; replicas may not have the account yet
+    database.stick_to_primary(db, new_user.id)
     db.commit()
     db.refresh(new_user)
-    return new_user
+    return schemas.UserResponse.model_validate(new_user)
 
 @app.post("/users/login", response_model=schemas.Token, tags=["Users"])
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    # ... (code is unchanged)
-    user = auth.get_user(db, email=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await database.run_db(db, auth.get_user, form_data.username)
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await hashing.password_pool.run(
+            auth.verify_and_update, form_data.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -134,85 +254,394 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
         data={"sub": user.email, "user_id": user.id, "is_admin": user.is_admin}, 
         expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer", "is_admin": user.is_admin}
+    token = {"access_token": access_token, "token_type": "bearer", "is_admin": user.is_admin}
+    if new_hash:
+        # Migrates hashes to the configured BCRYPT_ROUNDS one login at a time.
+        # Last, since the commit expires `user`.
+        await database.run_db(db, auth.update_password_hash, user.id, user.hashed_password, new_hash)
+    return token
+
+@app.post("/users/logout", status_code=status.HTTP_204_NO_CONTENT, tags=["Users"])
+@database.db_endpoint
+def logout(
+    token: str = Depends(auth.oauth2_scheme),
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> Response:
+    """Revokes the presented token on every worker. The user's other tokens stay valid."""
+    claims = auth.decode_token(token)
+    if not claims.get("jti"):
+        # Issued before tokens carried an id; it lapses at its `exp`
+        raise HTTPException(status_code=400, detail="Token cannot be revoked, it expires on its own")
+    revocation.revoke_token(db, claims)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-@app.get("/users/me", response_model=schemas.UserResponse, tags=["Users"])
-def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
-    return current_user
+@app.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT, tags=["Users"])
+@database.db_endpoint
+def revoke_user_tokens(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_admin_user)
+) -> Response:
+    """Signs a user out everywhere: every token issued to them so far stops working."""
+    if db.query(models.User.id).filter(models.User.id == user_id).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    revocation.revoke_all_for_user(db, user_id, timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@app.get(
+    "/users/me", response_model=Union[schemas.UserResponse, schemas.UserProfile],
+    tags=["Users"], responses=pagination.NEXT_CURSOR_RESPONSES,
+)
+@database.db_endpoint
+def read_users_me(
+    response: Response,
+    expand: Optional[Literal["bookings"]] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> Union[schemas.UserResponse, schemas.UserProfile]:
+    """
+    The current user's profile. Pass `expand=bookings` to include a page of
+    their bookings, paged with `limit`/`cursor` like `/bookings/me`.
+    """
+    profile = schemas.UserProfile.model_validate(current_user)
+    if expand != "bookings":
+        return profile
+    query = own_bookings_query(db, current_user.id, cursor, limit)
+    bookings = [
+        schemas.BookingResponse.model_validate(b)
+        for b in query.options(joinedload(models.Booking.flight)).all()
+    ]
+    return schemas.UserResponse(**profile.model_dump(), bookings=trim_page(response, bookings, limit))
 
 # --- Flight Endpoints (Unchanged) ---
 @app.post("/flights/", response_model=schemas.FlightResponse, status_code=status.HTTP_201_CREATED, tags=["Flights"])
+@database.db_endpoint
 def add_flight(
     flight: schemas.FlightCreate, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_admin_user)
-):
-    # ... (code is unchanged)
+    current_user: auth.Principal = Depends(auth.get_current_admin_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+) -> schemas.FlightResponse:
+    if idempotency_key:
+        req_hash = idempotency.request_hash("POST", "/flights/", flight)
+        replayed = idempotency.replay(db, current_user.id, idempotency_key, req_hash)
+        if replayed:
+            return replayed
+
     db_flight = models.Flight(
         **flight.model_dump(),
         available_seats=flight.total_seats
     )
+    if flight.seat_shards > 1:
+        db_flight.shards = inventory.split_into_shards(flight.total_seats, flight.seat_shards)
     db.add(db_flight)
-    db.commit()
+    if idempotency_key:
+        db.flush()
+        idempotency.record(
+            db, current_user.id, idempotency_key, req_hash,
+            status.HTTP_201_CREATED, schemas.FlightResponse.model_validate(db_flight)
+        )
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        # A concurrent retry with the same key committed first
+        replayed = idempotency_key and idempotency.replay(db, current_user.id, idempotency_key, req_hash)
+        if replayed:
+            return replayed
+        raise
     db.refresh(db_flight)
+    connections.flight_graph.add_flight(db_flight)
+    autocomplete.flight_autocomplete.add_flight(db_flight)
+    caching.flight_cache.put(db_flight)
     return db_flight
 
-@app.get("/flights/", response_model=List[schemas.FlightResponse], tags=["Flights"])
-def list_flights(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    # ... (code is unchanged)
-    flights = db.query(models.Flight).offset(skip).limit(limit).all()
-    return flights
+@app.get("/flights/", response_model=List[schemas.FlightResponse], tags=["Flights"], responses=pagination.NEXT_CURSOR_RESPONSES)
+@database.db_endpoint
+def list_flights(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = fieldsets.FIELDS_QUERY,
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    db: Session = Depends(get_read_db)
+) -> List[schemas.FlightResponse]:
+    """
+    List flights by departure time. Follow the `X-Next-Cursor` response
+    header with `cursor=` to page through; `skip` is kept for old clients.
+    Responses carry an ETag; send it back in `If-None-Match` to get a 304.
+    """
+    names = fieldsets.parse(fields, schemas.FlightResponse)
+    query = db.query(models.Flight).order_by(models.Flight.departure_time, models.Flight.id)
+    if cursor:
+        departure_time, flight_id = pagination.decode_cursor(cursor, datetime.fromisoformat, int)
+        query = query.filter(tuple_(models.Flight.departure_time, models.Flight.id) > (departure_time, flight_id))
+    else:
+        query = query.offset(skip)
+    # Fetch one extra row to learn whether there is a next page
+    query = query.limit(limit + 1)
 
-@app.get("/flights/{flight_id}", response_model=schemas.FlightResponse, tags=["Flights"])
-def get_flight_details(flight_id: int, db: Session = Depends(get_db)):
-    # ... (code is unchanged)
+    # Ids and versions pin down the page's content, so the ETag comes from a
+    # narrow query; full rows are only loaded when the client's copy is stale.
+    page = query.with_entities(models.Flight.id, models.Flight.version, models.Flight.departure_time).all()
+    headers = {}
+    if len(page) > limit:
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            page[limit - 1].departure_time, page[limit - 1].id
+        )
+    # The fetched rows include the look-ahead one, so the page size must be in
+    # the ETag too, or limit=2 and limit=3 over three flights would share a page
+    etag = etags.make_etag(
+        "flights", names, limit, "cursor" if cursor else "skip", [(row.id, row.version) for row in page]
+    )
+    if etags.matches(if_none_match, etag):
+        return etags.not_modified(etag, headers)
+    if names:
+        items = singleflight.reads.do(("flights", etag), lambda: [
+            fieldsets.project(f, names, schemas.FlightResponse)
+            for f in query.options(fieldsets.columns(models.Flight, names)).all()[:limit]
+        ])
+        return JSONResponse(items, headers={etags.ETAG_HEADER: etag, **headers})
+    response.headers.update({etags.ETAG_HEADER: etag, **headers})
+    # Keyed by ETag so a request never shares a page older than its own ETag
+    return singleflight.reads.do(
+        ("flights", etag),
+        lambda: [schemas.FlightResponse.model_validate(f) for f in query.all()[:limit]]
+    )
+
+def as_naive_utc(value: datetime) -> datetime:
+    """Flight times are stored as naive UTC; normalize query parameters to match."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+# Declared before /flights/{flight_id} so "search" is not parsed as an id
+@app.get("/flights/search", response_model=List[schemas.FlightResponse], tags=["Flights"])
+@database.db_endpoint
+def search_flights(
+    departure: Optional[str] = None,
+    destination: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_seats: int = Query(1, ge=0),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = fieldsets.FIELDS_QUERY,
+    db: Session = Depends(get_read_db)
+) -> List[schemas.FlightResponse]:
+    """
+    Find flights by route and departure window, soonest first.
+    Route filters are exact matches so the composite
+    (departure, destination, departure_time) index can be used.
+    """
+    names = fieldsets.parse(fields, schemas.FlightResponse)
+    query = db.query(models.Flight)
+    if departure:
+        query = query.filter(models.Flight.departure == departure)
+    if destination:
+        query = query.filter(models.Flight.destination == destination)
+    if date_from:
+        query = query.filter(models.Flight.departure_time >= as_naive_utc(date_from))
+    if date_to:
+        query = query.filter(models.Flight.departure_time <= as_naive_utc(date_to))
+    if min_seats:
+        query = query.filter(models.Flight.available_seats >= min_seats)
+    query = query.order_by(models.Flight.departure_time, models.Flight.id).offset(skip).limit(limit)
+    if names:
+        return JSONResponse([
+            fieldsets.project(f, names, schemas.FlightResponse)
+            for f in query.options(fieldsets.columns(models.Flight, names))
+        ])
+    return query.all()
+
+@app.get("/flights/autocomplete", response_model=List[schemas.AutocompleteSuggestion], tags=["Flights"])
+@database.db_endpoint
+def autocomplete_flights(
+    field: Literal["departure", "destination", "airline"],
+    prefix: str = Query("", max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+) -> List[schemas.AutocompleteSuggestion]:
+    """
+    Type-ahead suggestions for a flight column, most used first.
+    Served from an in-memory prefix index; the database is only read to build it.
+    """
+    autocomplete.flight_autocomplete.ensure_loaded(db)
+    return [
+        schemas.AutocompleteSuggestion(value=value, count=count)
+        for value, count in autocomplete.flight_autocomplete.suggest(field, prefix, limit)
+    ]
+
+@app.get("/flights/connections", response_model=List[schemas.ItineraryResponse], tags=["Flights"])
+@database.db_endpoint
+def search_connections(
+    departure: str,
+    destination: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    max_legs: int = Query(3, ge=1, le=4),
+    min_connection_minutes: int = Query(45, ge=0),
+    max_connection_minutes: int = Query(720, ge=1),
+    passengers: int = Query(1, ge=1, le=schemas.MAX_BATCH_BOOKINGS),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+) -> List[schemas.ItineraryResponse]:
+    """
+    Find direct and connecting itineraries, earliest arrival first.
+    The first leg departs within [date_from, date_to] (default: the next 24 hours).
+    """
+    if departure == destination:
+        raise HTTPException(status_code=400, detail="Departure and destination must differ")
+    if min_connection_minutes > max_connection_minutes:
+        raise HTTPException(status_code=400, detail="min_connection_minutes exceeds max_connection_minutes")
+    earliest = as_naive_utc(date_from) if date_from else holds.utcnow()
+    latest = as_naive_utc(date_to) if date_to else earliest + timedelta(days=1)
+
+    connections.flight_graph.ensure_loaded(db)
+    # The graph has no seat counts: load the legs of the results in one query
+    # and, if any are full (or gone), search again without them. Each round
+    # excludes at least one more flight, so this ends.
+    flights: Dict[int, models.Flight] = {}
+    full: Set[int] = set()
+    while True:
+        itineraries = connections.flight_graph.search(
+            departure, destination, earliest, latest, max_legs,
+            timedelta(minutes=min_connection_minutes), timedelta(minutes=max_connection_minutes),
+            limit, exclude=full
+        )
+        unchecked = {leg.flight_id for itinerary in itineraries for leg in itinerary} - flights.keys()
+        if unchecked:
+            flights.update((f.id, f) for f in db.query(models.Flight).filter(models.Flight.id.in_(unchecked)))
+        newly_full = {
+            flight_id for flight_id in unchecked
+            if flight_id not in flights or flights[flight_id].available_seats < passengers
+        }
+        if not newly_full:
+            break
+        full |= newly_full
+
+    results = []
+    for itinerary in itineraries:
+        legs = [flights[leg.flight_id] for leg in itinerary]
+        results.append(schemas.ItineraryResponse(
+            legs=legs,
+            departure_time=legs[0].departure_time,
+            arrival_time=legs[-1].arrival_time,
+            duration_minutes=int((legs[-1].arrival_time - legs[0].departure_time).total_seconds() // 60),
+            stops=len(legs) - 1
+        ))
+    return results
+
+def load_flight(db: Session, flight_id: int) -> Optional[caching.CachedFlight]:
     flight = db.query(models.Flight).filter(models.Flight.id == flight_id).first()
     if flight is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Flight not found")
-    return flight
+        return None
+    return caching.flight_cache.put(flight, inventory.live_available_seats(db, flight))
+
+@app.get("/flights/{flight_id}", response_model=schemas.FlightResponse, tags=["Flights"])
+@database.db_endpoint
+def get_flight_details(
+    flight_id: int,
+    fields: Optional[str] = fieldsets.FIELDS_QUERY,
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    db: Session = Depends(get_read_db)
+) -> Response:
+    names = fieldsets.parse(fields, schemas.FlightResponse)
+    cached = caching.flight_cache.get(flight_id)
+    if cached is None:
+        # Concurrent misses for the same flight share one query
+        cached = singleflight.reads.do(("flight", flight_id), lambda: load_flight(db, flight_id))
+        if cached is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Flight not found")
+    if names:
+        # A single cached row, so the fields are picked from it rather than selected
+        etag = etags.make_etag(cached.etag, names)
+        if etags.matches(if_none_match, etag):
+            return etags.not_modified(etag)
+        body = json.loads(cached.body)
+        return JSONResponse({name: body[name] for name in names}, headers={etags.ETAG_HEADER: etag})
+    if etags.matches(if_none_match, cached.etag):
+        return etags.not_modified(cached.etag)
+    return Response(content=cached.body, media_type="application/json", headers={etags.ETAG_HEADER: cached.etag})
 
 @app.delete("/flights/{flight_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Flights"])
+@database.db_endpoint
 def delete_flight(
     flight_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_admin_user)
-):
+    current_user: auth.Principal = Depends(auth.get_current_admin_user)
+) -> Response:
     # ... (code is unchanged)
     db_flight = db.query(models.Flight).filter(models.Flight.id == flight_id).first()
     if not db_flight:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Flight not found")
+    indexed_values = autocomplete.values_of(db_flight)
+    # The cascade removes bookings, so their owners' booking lists change
+    etags.bump_bookings_versions_for_flight(db, flight_id)
+    # Holds and waitlist entries point at the bookings they produced and the
+    # unit of work does not know to delete them first, so they go before the
+    # cascade runs. Databases created before booking_id had ON DELETE SET NULL
+    # rely on this.
+    db.query(models.SeatHold).filter(models.SeatHold.flight_id == flight_id).delete(synchronize_session=False)
+    db.query(models.WaitlistEntry).filter(models.WaitlistEntry.flight_id == flight_id).delete(synchronize_session=False)
     db.delete(db_flight)
+    caching.mark_dirty(db, flight_id)
     try:
         db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    inventory.forget_flight(flight_id)
+    connections.flight_graph.remove_flight(flight_id)
+    autocomplete.flight_autocomplete.remove_flight(indexed_values)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # --- Booking Endpoints ---
 
+def ensure_passport_available(db: Session, flight_id: int, passport_number: str):
+    """Raises 400 if the passport already holds an active booking on the flight."""
+    existing_booking = db.query(models.Booking).filter(
+        models.Booking.flight_id == flight_id,
+        models.Booking.passport_number == passport_number,
+        models.Booking.status == "Booked"
+    ).first()
+    if existing_booking:
+        raise HTTPException(status_code=400, detail="Passport number already registered for this flight")
+
 @app.post("/flights/{flight_id}/book", response_model=schemas.BookingResponse, status_code=status.HTTP_201_CREATED, tags=["Bookings"])
+@database.db_endpoint
 def book_ticket(
     flight_id: int, 
     booking: schemas.BookingCreate,
     background_tasks: BackgroundTasks, # <-- Inject BackgroundTasks
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
-):
-    # ... (validation logic is unchanged) ...
-    db_flight = db.query(models.Flight).filter(models.Flight.id == flight_id).first()
-    if not db_flight:
-        raise HTTPException(status_code=404, detail="Flight not found")
-    if db_flight.available_seats <= 0:
+    current_user: auth.Principal = Depends(auth.get_current_principal),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+) -> schemas.BookingResponse:
+    """
+    Book one seat. Send an `Idempotency-Key` header to make retries safe:
+    a repeated key replays the original response without touching the flight.
+    """
+    if idempotency_key:
+        req_hash = idempotency.request_hash("POST", f"/flights/{flight_id}/book", booking)
+        replayed = idempotency.replay(db, current_user.id, idempotency_key, req_hash)
+        if replayed:
+            return replayed
+
+    ensure_passport_available(db, flight_id, booking.passport_number)
+
+    # Claim the seat with a single guarded UPDATE. The affected-row count is the
+    # source of truth, so concurrent workers can never both take the last seat.
+    if not inventory.take_seats(db, flight_id):
+        db.rollback()
+        # Only the failure path pays for a lookup to tell "missing" from "full".
+        if not inventory.flight_exists(db, flight_id):
+            raise HTTPException(status_code=404, detail="Flight not found")
         raise HTTPException(status_code=400, detail="No available seats")
-    
-    existing_booking = db.query(models.Booking).filter(
-        models.Booking.flight_id == flight_id,
-        models.Booking.passport_number == booking.passport_number,
-        models.Booking.status == "Booked"
-    ).first()
-    if existing_booking:
-        raise HTTPException(status_code=400, detail="Passport number already registered for this flight")
 
     db_booking = models.Booking(
         **booking.model_dump(),
@@ -220,11 +649,16 @@ def book_ticket(
         user_id=current_user.id,
         status="Booked"
     )
-    db_flight.available_seats -= 1
     
     try:
         db.add(db_booking)
-        db.add(db_flight)
+        etags.bump_bookings_version(db, current_user.id)
+        if idempotency_key:
+            db.flush()
+            idempotency.record(
+                db, current_user.id, idempotency_key, req_hash,
+                status.HTTP_201_CREATED, schemas.BookingResponse.model_validate(db_booking)
+            )
         db.commit()
         db.refresh(db_booking)
         
@@ -232,28 +666,117 @@ def book_ticket(
         background_tasks.add_task(
             send_booking_confirmation, 
             current_user.email, 
-            db_booking
+            schemas.BookingResponse.model_validate(db_booking)
         )
         
         return db_booking
     except Exception as e:
         db.rollback()
+        # A concurrent retry with the same key committed first
+        replayed = idempotency_key and idempotency.replay(db, current_user.id, idempotency_key, req_hash)
+        if replayed:
+            return replayed
         if "passport" in str(e).lower(): 
              raise HTTPException(status_code=422, detail="Invalid passport number format.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred during booking: {e}")
 
+@app.post("/flights/{flight_id}/book/batch", response_model=List[schemas.BookingResponse], status_code=status.HTTP_201_CREATED, tags=["Bookings"])
+@database.db_endpoint
+def book_tickets_batch(
+    flight_id: int,
+    bookings: Annotated[List[schemas.BookingCreate], Body(min_length=1, max_length=schemas.MAX_BATCH_BOOKINGS)],
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> List[schemas.BookingResponse]:
+    """
+    Book several passengers on one flight in a single transaction.
+    Either every passenger is booked or none are.
+    """
+    passports = [booking.passport_number for booking in bookings]
+    if len(set(passports)) != len(passports):
+        raise HTTPException(status_code=400, detail="Duplicate passport numbers in batch")
+
+    # One IN (...) query covering the whole group, matching _passport_flight_uc
+    taken = db.query(models.Booking.passport_number).filter(
+        models.Booking.flight_id == flight_id,
+        models.Booking.passport_number.in_(passports)
+    ).all()
+    if taken:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Passport numbers already registered for this flight: {', '.join(sorted(p for (p,) in taken))}"
+        )
+
+    if not inventory.take_seats(db, flight_id, len(bookings)):
+        db.rollback()
+        if not inventory.flight_exists(db, flight_id):
+            raise HTTPException(status_code=404, detail="Flight not found")
+        raise HTTPException(status_code=400, detail="Not enough available seats")
+
+    db_bookings = [
+        models.Booking(
+            **booking.model_dump(),
+            flight_id=flight_id,
+            user_id=current_user.id,
+            status="Booked"
+        )
+        for booking in bookings
+    ]
+    try:
+        db.add_all(db_bookings)
+        etags.bump_bookings_version(db, current_user.id)
+        db.flush()
+        booking_ids = [db_booking.id for db_booking in db_bookings]
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred during booking: {e}")
+
+    # Reload the group with its flight in one query instead of one per booking
+    db_bookings = db.query(models.Booking).options(joinedload(models.Booking.flight)).filter(
+        models.Booking.id.in_(booking_ids)
+    ).order_by(models.Booking.id).all()
+
+    background_tasks.add_task(
+        send_group_booking_confirmation,
+        current_user.email,
+        [schemas.BookingResponse.model_validate(b) for b in db_bookings]
+    )
+
+    return db_bookings
+
+def return_seat_or_promote(db: Session, flight_id: int) -> Optional[models.Booking]:
+    """
+    Gives a freed seat to the head of the waitlist, or back to the flight if
+    nobody is waiting. Returns the promoted booking, if any.
+    """
+    promoted_booking = waitlist.promote_next(db, flight_id)
+    if promoted_booking is None:
+        # Return the seat in place instead of a read-modify-write on the flight row
+        inventory.release_seats(db, flight_id)
+    return promoted_booking
+
 @app.delete("/bookings/{booking_id}", response_model=schemas.BookingResponse, tags=["Bookings"])
+@database.db_endpoint
 def cancel_booking(
     booking_id: int,
     background_tasks: BackgroundTasks, # <-- MODIFIED: Add BackgroundTasks
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
-):
+    current_user: auth.Principal = Depends(auth.get_current_principal),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+) -> schemas.BookingResponse:
     """
     Cancel an existing booking.
     A user can cancel their own booking.
     An admin can cancel *any* booking.
     """
+    if idempotency_key:
+        req_hash = idempotency.request_hash("DELETE", f"/bookings/{booking_id}")
+        replayed = idempotency.replay(db, current_user.id, idempotency_key, req_hash)
+        if replayed:
+            return replayed
+
     db_booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
 
     if not db_booking:
@@ -262,17 +785,24 @@ def cancel_booking(
     if db_booking.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to cancel this booking")
 
-    if db_booking.status == "Canceled":
+    # Guarded UPDATE: of two concurrent cancellations only one may return the seat.
+    # It also takes the booking's row lock on databases that have them.
+    canceled = db.query(models.Booking).filter(
+        models.Booking.id == booking_id,
+        models.Booking.status != "Canceled"
+    ).update({models.Booking.status: "Canceled"}, synchronize_session="evaluate")
+    if not canceled:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Booking is already canceled")
+    etags.bump_bookings_version(db, db_booking.user_id)
 
-    db_flight = db.query(models.Flight).filter(models.Flight.id == db_booking.flight_id).first()
-    
-    db_booking.status = "Canceled"
-    db.add(db_booking)
+    promoted_booking = return_seat_or_promote(db, db_booking.flight_id)
 
-    if db_flight: # Check if flight still exists
-        db_flight.available_seats += 1
-        db.add(db_flight)
+    if idempotency_key:
+        idempotency.record(
+            db, current_user.id, idempotency_key, req_hash,
+            status.HTTP_200_OK, schemas.BookingResponse.model_validate(db_booking)
+        )
 
     try:
         db.commit()
@@ -284,8 +814,14 @@ def cancel_booking(
         background_tasks.add_task(
             send_cancellation_email, 
             email_to, 
-            db_booking
+            schemas.BookingResponse.model_validate(db_booking)
         )
+        if promoted_booking:
+            background_tasks.add_task(
+                send_waitlist_promotion_email,
+                promoted_booking.owner.email,
+                schemas.BookingResponse.model_validate(promoted_booking)
+            )
         
         return db_booking
     except Exception as e:
@@ -293,10 +829,293 @@ def cancel_booking(
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
 
-@app.get("/bookings/me", response_model=List[schemas.BookingResponse], tags=["Bookings"])
+def own_bookings_query(db: Session, user_id: int, cursor: Optional[str], limit: int):
+    """The user's bookings after `cursor`, oldest first, plus one row to tell if another page follows."""
+    query = db.query(models.Booking).filter(models.Booking.user_id == user_id)
+    if cursor:
+        (after_id,) = pagination.decode_cursor(cursor, int)
+        query = query.filter(models.Booking.id > after_id)
+    return query.order_by(models.Booking.id).limit(limit + 1)
+
+def trim_page(response: Response, bookings: List[schemas.BookingResponse], limit: int) -> List[schemas.BookingResponse]:
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(bookings[-1].id)
+    return bookings
+
+@app.get("/bookings/me", response_model=List[schemas.BookingResponse], tags=["Bookings"], responses=pagination.NEXT_CURSOR_RESPONSES)
+@database.db_endpoint
 def get_my_bookings(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = fieldsets.FIELDS_QUERY,
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    db: Session = Depends(get_read_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> List[schemas.BookingResponse]:
+    """
+    List the current user's bookings, oldest first. Follow the
+    `X-Next-Cursor` response header with `cursor=` to page through.
+    Responses carry an ETag; send it back in `If-None-Match` to get a 304.
+    """
+    names = fieldsets.parse(fields, schemas.BookingResponse)
+    query = own_bookings_query(db, current_user.id, cursor, limit)
+
+    # The user's bookings_version fixes which bookings are on the page; the
+    # embedded flights can still change, which the sum of their versions catches.
+    # Both come from the session the page is read from, so a lagging replica
+    # can never pair a fresh ETag with stale rows.
+    page_flights = query.with_entities(models.Booking.flight_id).scalar_subquery()
+    flight_versions = (
+        select(func.coalesce(func.sum(models.Flight.version), 0))
+        .where(models.Flight.id.in_(page_flights))
+        .scalar_subquery()
+    )
+    versions = db.query(models.User.bookings_version, flight_versions).filter(
+        models.User.id == current_user.id
+    ).first()
+    etag = etags.make_etag("bookings", current_user.id, cursor, limit, names, *(versions or ()))
+    response.headers[etags.ETAG_HEADER] = etag
+    if etags.matches(if_none_match, etag):
+        return etags.not_modified(etag)
+
+    if names:
+        options = [fieldsets.columns(models.Booking, names)]
+        if "flight" in names:
+            options.append(joinedload(models.Booking.flight))
+        # Ids ride along for the cursor even when `id` is not a requested field
+        rows = singleflight.reads.do(("bookings", etag), lambda: [
+            (b.id, fieldsets.project(b, names, schemas.BookingResponse)) for b in query.options(*options).all()
+        ])
+        headers = {etags.ETAG_HEADER: etag}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(rows[-1][0])
+        return JSONResponse([item for _, item in rows], headers=headers)
+
+    bookings = singleflight.reads.do(
+        ("bookings", etag),
+        lambda: [
+            schemas.BookingResponse.model_validate(b)
+            for b in query.options(joinedload(models.Booking.flight)).all()
+        ]
+    )
+    return trim_page(response, bookings, limit)
+
+# --- Seat Hold Endpoints ---
+
+@app.post("/flights/{flight_id}/holds", response_model=schemas.SeatHoldResponse, status_code=status.HTTP_201_CREATED, tags=["Holds"])
+@database.db_endpoint
+def create_hold(
+    flight_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
-):
-    bookings = db.query(models.Booking).filter(models.Booking.user_id == current_user.id).all()
-    return bookings
\ No newline at end of file
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> schemas.SeatHoldResponse:
+    """
+    Hold one seat for `SEAT_HOLD_TTL_SECONDS` while the user completes checkout.
+    Holds that are not confirmed in time are released by the background sweeper.
+    """
+    if not inventory.take_seats(db, flight_id):
+        db.rollback()
+        if not inventory.flight_exists(db, flight_id):
+            raise HTTPException(status_code=404, detail="Flight not found")
+        raise HTTPException(status_code=400, detail="No available seats")
+
+    db_hold = models.SeatHold(
+        flight_id=flight_id,
+        user_id=current_user.id,
+        status="Held",
+        expires_at=holds.hold_expiry()
+    )
+    try:
+        db.add(db_hold)
+        db.commit()
+        db.refresh(db_hold)
+        return db_hold
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+def get_own_hold(db: Session, hold_id: int, current_user: auth.Principal) -> models.SeatHold:
+    db_hold = db.query(models.SeatHold).filter(models.SeatHold.id == hold_id).first()
+    if not db_hold:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found")
+    if db_hold.user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this hold")
+    if db_hold.status != "Held":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Hold is already {db_hold.status.lower()}")
+    return db_hold
+
+@app.post("/holds/{hold_id}/confirm", response_model=schemas.BookingResponse, status_code=status.HTTP_201_CREATED, tags=["Holds"])
+@database.db_endpoint
+def confirm_hold(
+    hold_id: int,
+    booking: schemas.BookingCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> schemas.BookingResponse:
+    """
+    Turn an active hold into a booking. The seat was already taken when the
+    hold was created, so this does not touch the flight row at all.
+    """
+    db_hold = get_own_hold(db, hold_id, current_user)
+    if db_hold.expires_at <= holds.utcnow():
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Hold has expired")
+
+    ensure_passport_available(db, db_hold.flight_id, booking.passport_number)
+
+    db_booking = models.Booking(
+        **booking.model_dump(),
+        flight_id=db_hold.flight_id,
+        user_id=db_hold.user_id,
+        status="Booked"
+    )
+    try:
+        db.add(db_booking)
+        db.flush()
+        # Guard against the sweeper (or a concurrent request) getting there first
+        if not holds.transition_hold(db, hold_id, "Confirmed", booking_id=db_booking.id):
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Hold is no longer active")
+        etags.bump_bookings_version(db, db_hold.user_id)
+        db.commit()
+        db.refresh(db_booking)
+
+        background_tasks.add_task(
+            send_booking_confirmation,
+            db_booking.owner.email,
+            schemas.BookingResponse.model_validate(db_booking)
+        )
+
+        return db_booking
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred during booking: {e}")
+
+@app.delete("/holds/{hold_id}", response_model=schemas.SeatHoldResponse, tags=["Holds"])
+@database.db_endpoint
+def release_hold(
+    hold_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> schemas.SeatHoldResponse:
+    """Release an active hold early and return its seat to the flight."""
+    db_hold = get_own_hold(db, hold_id, current_user)
+
+    if not holds.transition_hold(db, hold_id, "Released"):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Hold is no longer active")
+    promoted_booking = return_seat_or_promote(db, db_hold.flight_id)
+
+    try:
+        db.commit()
+        db.refresh(db_hold)
+        if promoted_booking:
+            background_tasks.add_task(
+                send_waitlist_promotion_email,
+                promoted_booking.owner.email,
+                schemas.BookingResponse.model_validate(promoted_booking)
+            )
+        return db_hold
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+
+# --- Waitlist Endpoints ---
+
+@app.post("/flights/{flight_id}/waitlist", response_model=schemas.WaitlistResponse, status_code=status.HTTP_201_CREATED, tags=["Waitlist"])
+@database.db_endpoint
+def join_waitlist(
+    flight_id: int,
+    booking: schemas.BookingCreate,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> schemas.WaitlistResponse:
+    """
+    Queue a passenger for a sold-out flight. When a booking on the flight is
+    canceled, the first passenger in the queue is booked automatically and
+    notified by email, so there is no need to poll the flight.
+    """
+    db_flight = db.query(models.Flight).filter(models.Flight.id == flight_id).first()
+    if not db_flight:
+        raise HTTPException(status_code=404, detail="Flight not found")
+    if inventory.live_available_seats(db, db_flight) > 0:
+        raise HTTPException(status_code=400, detail="Flight has available seats, book it directly")
+
+    # Match _passport_flight_uc so the entry can always be promoted later
+    already_booked = db.query(models.Booking.id).filter(
+        models.Booking.flight_id == flight_id,
+        models.Booking.passport_number == booking.passport_number
+    ).first()
+    if already_booked:
+        raise HTTPException(status_code=400, detail="Passport number already registered for this flight")
+    already_waiting = db.query(models.WaitlistEntry.id).filter(
+        models.WaitlistEntry.flight_id == flight_id,
+        models.WaitlistEntry.passport_number == booking.passport_number,
+        models.WaitlistEntry.status == "Waiting"
+    ).first()
+    if already_waiting:
+        raise HTTPException(status_code=400, detail="Passport number is already on the waitlist for this flight")
+
+    db_entry = waitlist.new_entry(flight_id, current_user.id, booking.passenger_name, booking.passport_number)
+    try:
+        db.add(db_entry)
+        db.commit()
+        db.refresh(db_entry)
+        return db_entry
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+@app.get("/waitlist/me", response_model=List[schemas.WaitlistResponse], tags=["Waitlist"])
+@database.db_endpoint
+def get_my_waitlist(
+    db: Session = Depends(get_read_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> List[schemas.WaitlistResponse]:
+    return db.query(models.WaitlistEntry).filter(
+        models.WaitlistEntry.user_id == current_user.id
+    ).order_by(models.WaitlistEntry.id).all()
+
+@app.delete("/waitlist/{entry_id}", response_model=schemas.WaitlistResponse, tags=["Waitlist"])
+@database.db_endpoint
+def leave_waitlist(
+    entry_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_principal)
+) -> schemas.WaitlistResponse:
+    db_entry = db.query(models.WaitlistEntry).filter(models.WaitlistEntry.id == entry_id).first()
+    if not db_entry:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Waitlist entry not found")
+    if db_entry.user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to change this waitlist entry")
+    if not waitlist.leave(db, entry_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Waitlist entry is already {db_entry.status.lower()}")
+
+    try:
+        db.commit()
+        db.refresh(db_entry)
+        return db_entry
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+# --- Metrics Endpoint ---
+
+@app.get("/metrics", tags=["Metrics"])
+def get_metrics(current_user: auth.Principal = Depends(auth.get_current_admin_user)):
+    """Per-worker cache and request-coalescing counters."""
+    return {
+        "flight_cache": caching.flight_cache.stats(),
+        "single_flight": singleflight.reads.stats(),
+        "principal_cache": auth.principal_cache.stats(),
+        "token_cache": auth.token_cache.stats(),
+        "token_revocations": revocation.revocations.stats(),
+        "password_hashing": hashing.password_pool.stats(),
+    }
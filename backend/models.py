@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Flight(Base):
     __tablename__ = "flights"
+    __table_args__ = (
+        # Lets /flights/search answer route + date queries with an index range scan
+        Index("ix_flights_route_departure_time", "departure", "destination", "departure_time"),
+        # Keyset pagination order for list_flights
+        Index("ix_flights_departure_time_id", "departure_time", "id"),
+        # Never reuse ids of deleted flights; workers cache per-flight shard counts
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     flight_number = Column(String, unique=True, index=True, nullable=False)
@@ -14,8 +22,31 @@ class Flight(Base):
     arrival_time = Column(DateTime, nullable=False)  # <-- NEW
     total_seats = Column(Integer, nullable=False)
     available_seats = Column(Integer, nullable=False)
+    # 1 = seats are counted on this row. N > 1 = seats live in N FlightSeatShard
+    # rows and `available_seats` is their periodically compacted sum.
+    seat_shards = Column(Integer, default=1, nullable=False)
+    # Bumped whenever `available_seats` changes; the basis of flight ETags
+    version = Column(Integer, default=1, nullable=False)
 
     bookings = relationship("Booking", back_populates="flight", cascade="all, delete-orphan")
+    holds = relationship("SeatHold", back_populates="flight", cascade="all, delete-orphan")
+    shards = relationship("FlightSeatShard", back_populates="flight", cascade="all, delete-orphan")
+    waitlist = relationship("WaitlistEntry", back_populates="flight", cascade="all, delete-orphan")
+
+
+class FlightSeatShard(Base):
+    """One slice of a hot flight's seat inventory."""
+    __tablename__ = "flight_seat_shards"
+
+    id = Column(Integer, primary_key=True, index=True)
+    flight_id = Column(Integer, ForeignKey("flights.id"), nullable=False, index=True)
+    shard = Column(Integer, nullable=False)
+    available_seats = Column(Integer, nullable=False)
+
+    flight = relationship("Flight", back_populates="shards")
+    __table_args__ = (
+        UniqueConstraint('flight_id', 'shard', name='_flight_shard_uc'),
+    )
 
 
 class Booking(Base):
@@ -32,6 +63,82 @@ class Booking(Base):
         UniqueConstraint('passport_number', 'flight_id', name='_passport_flight_uc'),
     )
 
+# --- Seat Hold Model ---
+class SeatHold(Base):
+    """A time-limited claim on one seat, taken ahead of booking confirmation."""
+    __tablename__ = "seat_holds"
+
+    id = Column(Integer, primary_key=True, index=True)
+    flight_id = Column(Integer, ForeignKey("flights.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Held -> Confirmed | Released | Expired
+    status = Column(String, default="Held", nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # A deleted booking leaves the confirmed hold behind without it
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True)
+
+    flight = relationship("Flight", back_populates="holds")
+
+# --- Waitlist Model ---
+class WaitlistEntry(Base):
+    """A passenger queued for a sold-out flight. Lower ids are served first."""
+    __tablename__ = "waitlist_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    flight_id = Column(Integer, ForeignKey("flights.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    passenger_name = Column(String, nullable=False)
+    passport_number = Column(String, nullable=False)
+    # Waiting -> Promoted | Left | Skipped
+    status = Column(String, default="Waiting", nullable=False)
+    # A deleted booking leaves the promoted entry behind without it
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    flight = relationship("Flight", back_populates="waitlist")
+    owner = relationship("User")
+    __table_args__ = (
+        # Serves "head of the queue for this flight" without a sort
+        Index("ix_waitlist_flight_status_id", "flight_id", "status", "id"),
+    )
+
+# --- Idempotency Key Model ---
+class IdempotencyRecord(Base):
+    """The stored response of a write request made with an Idempotency-Key."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String, nullable=False)
+    # Hash of method, path and body, so a key cannot be reused for another request
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    # Records expire IDEMPOTENCY_TTL_SECONDS after this and are swept by it
+    created_at = Column(DateTime, nullable=False, index=True)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'key', name='_user_idempotency_key_uc'),
+    )
+
+# --- Token Revocation Model ---
+class RevokedToken(Base):
+    """
+    A revoked access token, or with no `jti`, every token of `user_id`
+    issued at or before `revoked_at`. Rows are pruned once `expires_at`
+    has passed, since the tokens they cover no longer verify anyway.
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    revoked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    __table_args__ = (
+        # Serves the revoke-all lookup for a user without touching jti rows
+        Index("ix_revoked_tokens_user_revoked_at", "user_id", "revoked_at"),
+    )
+
 # --- User Model (Modified) ---
 class User(Base):
     __tablename__ = "users"
@@ -42,5 +149,7 @@ class User(Base):
     
     # --- NEW FIELD ---
     is_admin = Column(Boolean, default=False, nullable=False)
+    # Bumped whenever one of the user's bookings is added, changed or removed
+    bookings_version = Column(Integer, default=1, nullable=False)
 
     bookings = relationship("Booking", back_populates="owner")
\ No newline at end of file
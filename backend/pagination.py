@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List
+
+from fastapi import HTTPException, status
+
+# --- Cursor Pagination ---
+# Cursors are opaque to clients: the sort key of the last row on a page,
+# JSON-encoded and base64url-wrapped. The next page starts strictly after it,
+# so deep pages cost the same as the first one (no OFFSET scan).
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+NEXT_CURSOR_RESPONSES = {
+    200: {
+        "headers": {
+            NEXT_CURSOR_HEADER: {
+                "description": "Pass as `cursor` to fetch the next page. Absent on the last page.",
+                "schema": {"type": "string"},
+            }
+        }
+    }
+}
+
+def encode_cursor(*values: Any) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> List[Any]:
+    """
+    Unpacks `cursor` and runs each value through the matching parser,
+    e.g. `decode_cursor(cursor, datetime.fromisoformat, int)`.
+    Raises 400 for anything that was not produced by `encode_cursor`.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError(cursor)
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, UnicodeError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
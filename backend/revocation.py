@@ -0,0 +1,300 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta, UTC
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Revocations the filter is sized for; past that its false-positive rate climbs
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+# How often each worker rebuilds its filter from the database, dropping
+# expired revocations and any it missed on the bus. With the local bus this
+# is how other workers learn of a revocation. 0 disables the sync.
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", 5))
+# How often expired rows are deleted. The rebuild already ignores them, so
+# this only bounds the table's size and can be slow (0 disables the sweeper).
+REVOCATION_PRUNE_SECONDS = int(os.getenv("REVOCATION_PRUNE_SECONDS", 3600))
+# "local" delivers revocations within this process; "redis" fans them out to every worker
+REVOCATION_BUS_BACKEND = os.getenv("REVOCATION_BUS_BACKEND", "local")
+REVOCATION_BUS_REDIS_URL = os.getenv("REVOCATION_BUS_REDIS_URL", "redis://localhost:6379/0")
+
+utcnow = database.utcnow
+
+def token_key(jti: str) -> str:
+    return f"jti:{jti}"
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+# --- Bloom Filter ---
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and a bounded false-positive
+    rate, in about 1.8 bytes per item at 0.1%. Items cannot be removed;
+    the filter is rebuilt instead.
+    """
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+# --- Buses ---
+# A bus carries revocation keys between workers. Every worker subscribes and
+# adds what it hears to its filter.
+
+class LocalRevocationBus:
+    """In-process stand-in for pub/sub: delivers to subscribers in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, key: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(key)
+
+class RedisRevocationBus:
+    """Redis pub/sub for multi-worker deployments. Requires the `redis` package."""
+
+    def __init__(self, url: str = REVOCATION_BUS_REDIS_URL, channel: str = "token-revocations"):
+        import redis  # Optional dependency, only needed for this backend
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.channel = channel
+        self._subscribers: List[Callable[[str], None]] = []
+        self._pubsub = None
+        self._thread = None
+
+    def _deliver(self, message: dict) -> None:
+        for callback in list(self._subscribers):
+            callback(message["data"])
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.append(callback)
+        if self._pubsub is None:
+            self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: self._deliver})
+            self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def unsubscribe(self, callback: Callable[[str], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+        if not self._subscribers and self._pubsub is not None:
+            self._thread.stop()
+            self._pubsub.close()
+            self._pubsub = self._thread = None
+
+    def publish(self, key: str) -> None:
+        self._redis.publish(self.channel, key)
+
+BUSES = {"local": LocalRevocationBus, "redis": RedisRevocationBus}
+
+# --- Revocation List ---
+# Checking a denylist table on every request would put a query back on the
+# path the token and principal caches took it off. Each worker instead keeps
+# a Bloom filter of revoked keys: a miss, which is nearly every request,
+# proves the token is live; only a hit is confirmed against the table.
+
+class RevocationList:
+    """This worker's filter of revoked tokens and users, fed by the bus."""
+
+    def __init__(
+        self,
+        bus,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = REVOCATION_BLOOM_ERROR_RATE,
+    ):
+        self.bus = bus
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        # Keys added while a rebuild is reading the table, replayed into its result
+        self._added_during_rebuild: Optional[List[str]] = None
+        self.checks = 0
+        self.filter_hits = 0
+        self.confirmed = 0
+
+    def start(self) -> None:
+        self.bus.subscribe(self.add)
+
+    def stop(self) -> None:
+        self.bus.unsubscribe(self.add)
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(key)
+            # The announcing worker also hears its own revocation on the bus
+            if key not in self._filter:
+                self._filter.add(key)
+
+    def announce(self, key: str) -> None:
+        """Adds a committed revocation here and publishes it to the other workers."""
+        self.add(key)
+        try:
+            self.bus.publish(key)
+        except Exception:
+            # The other workers pick it up on their next sync
+            logger.exception("Could not publish revocation %s", key)
+
+    def might_be_revoked(self, claims: dict) -> bool:
+        """False means the token is definitely live. True needs `confirm`."""
+        keys = [user_key(claims.get("user_id"))]
+        if claims.get("jti"):
+            keys.append(token_key(claims["jti"]))
+        with self._lock:
+            self.checks += 1
+            hit = any(key in self._filter for key in keys)
+            if hit:
+                self.filter_hits += 1
+        return hit
+
+    def confirm(self, db: Session, claims: dict) -> bool:
+        """Exact check of a filter hit against the revoked_tokens table."""
+        issued_at = datetime.fromtimestamp(float(claims.get("iat", 0)), UTC).replace(tzinfo=None)
+        conditions = [and_(
+            models.RevokedToken.jti.is_(None),
+            models.RevokedToken.user_id == claims.get("user_id"),
+            models.RevokedToken.revoked_at >= issued_at,
+        )]
+        if claims.get("jti"):
+            conditions.append(models.RevokedToken.jti == claims["jti"])
+        revoked = db.query(models.RevokedToken.id).filter(or_(*conditions)).first() is not None
+        if revoked:
+            with self._lock:
+                self.confirmed += 1
+        return revoked
+
+    def rebuild(self, db: Session) -> int:
+        """Replaces the filter with one built from the unexpired rows. Returns their count."""
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            rows = db.query(models.RevokedToken.jti, models.RevokedToken.user_id).filter(
+                models.RevokedToken.expires_at > utcnow()
+            ).all()
+            fresh = BloomFilter(self.capacity, self.error_rate)
+            for jti, user_id in rows:
+                fresh.add(token_key(jti) if jti is not None else user_key(user_id))
+        finally:
+            with self._lock:
+                added, self._added_during_rebuild = self._added_during_rebuild, None
+        with self._lock:
+            for key in added:
+                fresh.add(key)
+            self._filter = fresh
+        return len(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self.checks = self.filter_hits = self.confirmed = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": self._filter.count,
+                "capacity": self.capacity,
+                "checks": self.checks,
+                "filter_hits": self.filter_hits,
+                "confirmed": self.confirmed,
+                "false_positives": self.filter_hits - self.confirmed,
+            }
+
+revocations = RevocationList(BUSES[REVOCATION_BUS_BACKEND]())
+
+# --- Revoking ---
+# Rows are committed before they are announced, so a worker that hears of a
+# revocation can always confirm it.
+
+def _commit_revocation(db: Session, row: models.RevokedToken, key: str) -> None:
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The same token was revoked concurrently; announcing it again is harmless
+        db.rollback()
+    revocations.announce(key)
+
+def revoke_token(db: Session, claims: dict) -> None:
+    """Revokes one token by its `jti` until it would have expired anyway."""
+    _commit_revocation(db, models.RevokedToken(
+        jti=claims["jti"],
+        user_id=claims["user_id"],
+        revoked_at=utcnow(),
+        expires_at=datetime.fromtimestamp(claims["exp"], UTC).replace(tzinfo=None),
+    ), token_key(claims["jti"]))
+
+def revoke_all_for_user(db: Session, user_id: int, token_lifetime: timedelta) -> None:
+    """Revokes every token issued to the user so far; later logins are unaffected."""
+    now = utcnow()
+    _commit_revocation(db, models.RevokedToken(
+        user_id=user_id, revoked_at=now, expires_at=now + token_lifetime
+    ), user_key(user_id))
+
+def prune_expired(db: Session) -> int:
+    deleted = db.query(models.RevokedToken).filter(
+        models.RevokedToken.expires_at <= utcnow()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+async def run_revocation_sync(session_factory, interval: int = REVOCATION_SYNC_SECONDS):
+    """
+    Background task that loads the filter at startup, then rebuilds it
+    periodically. It only reads, so it never takes the write lock.
+    """
+    await database.run_periodically(
+        session_factory, revocations.rebuild, interval, "Token revocation sync", run_first=True
+    )
+
+async def run_revocation_pruner(session_factory, interval: int = REVOCATION_PRUNE_SECONDS):
+    """Background task that periodically deletes revocations of expired tokens."""
+    async def report(deleted: int) -> None:
+        if deleted:
+            logger.info("Deleted %d expired token revocations", deleted)
+
+    await database.run_periodically(
+        session_factory, prune_expired, interval, "Token revocation prune", on_result=report
+    )
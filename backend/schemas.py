@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, field_validator, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import re # <-- Import re for regex
 
 # Passport regex (example: 1-3 letters followed by 6-9 numbers)
@@ -17,6 +17,9 @@ class FlightBase(BaseModel):
     total_seats: int
 
 class FlightCreate(FlightBase):
+    # Split the seat inventory across this many counter rows for hot flights
+    seat_shards: int = Field(1, ge=1, le=64)
+
     @field_validator('total_seats')
     def validate_total_seats(cls, v):
         if v <= 0:
@@ -35,6 +38,19 @@ class FlightResponse(FlightBase):
     available_seats: int
     model_config = ConfigDict(from_attributes=True)
 
+# --- Connection Search Schemas ---
+class ItineraryResponse(BaseModel):
+    legs: List[FlightResponse]
+    departure_time: datetime
+    arrival_time: datetime
+    duration_minutes: int
+    stops: int
+
+# --- Autocomplete Schemas ---
+class AutocompleteSuggestion(BaseModel):
+    value: str
+    count: int
+
 # --- Booking Schemas (Modified) ---
 class BookingBase(BaseModel):
     passenger_name: str
@@ -44,6 +60,9 @@ class BookingBase(BaseModel):
 class BookingCreate(BookingBase):
     pass
 
+# Upper bound on passengers per group booking request
+MAX_BATCH_BOOKINGS = 200
+
 # ... (Rest of schemas are unchanged) ...
 class BookingResponse(BookingBase):
     id: int
@@ -53,6 +72,26 @@ class BookingResponse(BookingBase):
     flight: FlightResponse
     model_config = ConfigDict(from_attributes=True)
 
+# --- Seat Hold Schemas ---
+class SeatHoldResponse(BaseModel):
+    id: int
+    flight_id: int
+    user_id: int
+    status: str
+    expires_at: datetime
+    booking_id: Optional[int] = None
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Waitlist Schemas ---
+class WaitlistResponse(BookingBase):
+    id: int
+    flight_id: int
+    user_id: int
+    status: str
+    booking_id: Optional[int] = None
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
 class UserBase(BaseModel):
     email: EmailStr
 
@@ -60,12 +99,14 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=8, max_length=72)
     admin_secret: Optional[str] = None 
 
-class UserResponse(UserBase):
+class UserProfile(UserBase):
     id: int
     is_admin: bool
-    bookings: list[BookingResponse] = []
     model_config = ConfigDict(from_attributes=True)
 
+class UserResponse(UserProfile):
+    bookings: list[BookingResponse] = []
+
 class Token(BaseModel):
     access_token: str
     token_type: str
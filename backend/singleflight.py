@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from sqlalchemy.util import await_only
+
+# --- Single-Flight Request Coalescing ---
+# Concurrent identical reads within a worker share one database query:
+# the first caller for a key runs it, later callers wait for its result.
+# Results are shared between requests, so loaders must return plain values
+# (serialized flights, pydantic models), never session-bound ORM objects.
+#
+# In DB_ASYNC mode endpoint bodies run on the event loop (inside
+# AsyncSession.run_sync), where blocking on a threading.Event would stall
+# the loop and the leader with it; those callers wait on an asyncio future.
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+class _Call:
+    __slots__ = ("done", "future", "result", "error")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop]):
+        self.done = threading.Event()
+        self.future = loop.create_future() if loop is not None else None
+        self.result = None
+        self.error = None
+
+    def wait(self) -> None:
+        if self.future is not None and _running_loop() is self.future.get_loop():
+            # Suspends this request's greenlet; the loop keeps serving others
+            await_only(asyncio.shield(self.future))
+        else:
+            self.done.wait()
+
+    def finish(self) -> None:
+        self.done.set()
+        if self.future is not None and not self.future.done():
+            self.future.set_result(None)
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs `fn` unless a call for `key` is already in flight, then shares its outcome."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call(_running_loop())
+                self.executions += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.finish()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.executions = self.coalesced = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+reads = SingleFlight()
@@ -1,25 +1,55 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Background sweepers would run against the real database, not the test one
+os.environ.setdefault("SEAT_HOLD_SWEEP_SECONDS", "0")
+os.environ.setdefault("SEAT_SHARD_COMPACT_SECONDS", "0")
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "0")
+os.environ.setdefault("REVOCATION_PRUNE_SECONDS", "0")
+os.environ.setdefault("IDEMPOTENCY_SWEEP_SECONDS", "0")
+# The minimum bcrypt cost keeps password hashing from dominating the suite
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
 
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.util import await_only, greenlet_spawn
 from datetime import datetime, UTC, timedelta
 
 # --- Imports ---
-from main import app, get_db
-from database import Base
+from main import app, get_db, get_read_db
+import database
+from database import Base, create_db_engine, create_async_db_engine
 import models
 import auth 
+import holds
+import inventory
+import idempotency
+import pagination
+import connections
+import hashing
+import autocomplete
+import caching
+import singleflight
+import revocation
 
 # --- Test Database Setup ---
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Set TEST_DATABASE_URL to run the suite against another backend, e.g. PostgreSQL
+SQLALCHEMY_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# GET endpoints get a read-only session, so a read that writes fails the tests
+read_engine = create_db_engine(SQLALCHEMY_DATABASE_URL, read_only=True)
+TestingReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Override the `get_db` dependency
 def override_get_db():
@@ -29,7 +59,48 @@ def override_get_db():
     finally:
         db.close()
 
+def override_get_read_db():
+    try:
+        db = TestingReadSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+# DB_ASYNC=true runs the whole suite against the async endpoints
+if database.DB_ASYNC:
+    TestingAsyncSessionLocal = async_sessionmaker(create_async_db_engine(SQLALCHEMY_DATABASE_URL), autoflush=False)
+    async_read_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL, read_only=True)
+    TestingAsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False)
+
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    async def override_get_read_db():
+        async with TestingAsyncReadSessionLocal() as db:
+            yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_read_db
+
+# --- Statement Count Guard ---
+
+@contextmanager
+def max_statements(limit: int):
+    """Fails the test if the block sends more than `limit` SQL statements to any engine."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert len(statements) <= limit, (
+        f"{len(statements)} SQL statements, expected at most {limit}:\n" + "\n".join(statements)
+    )
 
 # --- Fixtures ---
 
@@ -44,6 +115,18 @@ def db_session():
     """A clean database session for each test function."""
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Flight ids restart after the tables are recreated
+    inventory.clear_shard_counts()
+    idempotency.clear()
+    connections.flight_graph.clear()
+    autocomplete.flight_autocomplete.clear()
+    caching.flight_cache.clear()
+    singleflight.reads.clear()
+    database.read_your_writes.clear()
+    # User ids restart too, so cached principals would point at the wrong rows
+    auth.principal_cache.clear()
+    auth.token_cache.clear()
+    revocation.revocations.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -126,6 +209,179 @@ def test_get_users_me(client, test_user):
     assert response.status_code == 200
     assert response.json()["email"] == "testuser@example.com"
 
+def test_login_rehashes_password_at_configured_cost(client, test_user, db_session):
+    legacy_hash = auth.get_password_hash("password123", rounds=auth.BCRYPT_ROUNDS + 1)
+    test_user.hashed_password = legacy_hash
+    db_session.commit()
+
+    get_auth_headers(client, "testuser@example.com", "password123")
+    db_session.refresh(test_user)
+    assert test_user.hashed_password != legacy_hash
+    assert auth.hash_rounds(test_user.hashed_password) == auth.BCRYPT_ROUNDS
+    # The upgraded hash still signs the user in and is left alone from then on
+    get_auth_headers(client, "testuser@example.com", "password123")
+    current_hash = test_user.hashed_password
+    db_session.refresh(test_user)
+    assert test_user.hashed_password == current_hash
+
+    # A wrong password never rewrites the hash
+    assert auth.verify_and_update("wrong", legacy_hash) == (False, None)
+
+def test_hashing_pool_rejects_beyond_queue_depth():
+    pool = hashing.HashingPool(workers=1, queue_size=1)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(release.wait)
+        release.set()
+        return rejected.value, await asyncio.gather(running, queued)
+
+    try:
+        rejected, results = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert results == [True, True]
+    assert pool.stats() == {"workers": 1, "pending": 0, "completed": 2, "rejected": 1}
+
+def test_login_sheds_load_when_hashing_is_saturated(client, test_user, monkeypatch):
+    saturated = hashing.HashingPool(workers=1, queue_size=0)
+    saturated.pending = saturated.max_pending
+    monkeypatch.setattr(hashing, "password_pool", saturated)
+    response = client.post("/users/login", data={"username": "testuser@example.com", "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_rejected_registrations_skip_password_hashing(client, test_user, monkeypatch):
+    saturated = hashing.HashingPool(workers=1, queue_size=0)
+    saturated.pending = saturated.max_pending
+    monkeypatch.setattr(hashing, "password_pool", saturated)
+    response = client.post("/users/register", json={"email": "testuser@example.com", "password": "password123"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+    response = client.post("/users/register", json={
+        "email": "new@example.com", "password": "password123", "admin_secret": "wrong-secret"
+    })
+    assert response.status_code == 400
+    assert saturated.rejected == 0
+
+def test_authentication_uses_cached_principal(client, test_user, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    assert client.get("/users/me", headers=headers).status_code == 200
+    # Warm cache: authenticating and answering the profile touch no database
+    with max_statements(0):
+        assert client.get("/users/me", headers=headers).json()["email"] == "testuser@example.com"
+
+    db_session.delete(test_user)
+    db_session.commit()
+    # Still trusted until the entry expires, then the deleted user is rejected
+    assert client.get("/users/me", headers=headers).status_code == 200
+    auth.principal_cache.invalidate(test_user.id)
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+def test_principal_cache_expires_and_evicts():
+    cache = auth.PrincipalCache(max_size=2, ttl=60)
+    for user_id in (1, 2, 3):
+        cache.put(auth.Principal(user_id, f"u{user_id}@example.com", False))
+    assert cache.get(1) is None
+    assert cache.get(3).email == "u3@example.com"
+
+    expired = auth.PrincipalCache(ttl=0)
+    expired.put(auth.Principal(1, "u1@example.com", False))
+    assert expired.get(1) is None
+    assert expired.stats() == {"size": 0, "hits": 0, "misses": 1, "evictions": 0, "hit_rate": 0.0}
+
+def test_repeated_token_is_verified_once(client, test_user, monkeypatch):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    def decode(*args, **kwargs):
+        raise AssertionError("cached token decoded again")
+    monkeypatch.setattr(auth.jwt, "decode", decode)
+    assert client.get("/users/me", headers=headers).status_code == 200
+    assert auth.token_cache.stats() == {"size": 1, "hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5}
+
+def test_token_cache_expires_and_evicts():
+    cache = auth.TokenCache(max_size=2)
+    later = time.time() + 60
+    for token in ("a", "b", "c"):
+        cache.put(token, {"user_id": token, "exp": later})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"user_id": "c", "exp": later}
+    # Claims are only trusted until the token expires; tokens without `exp` are not kept
+    cache.put("d", {"user_id": "d", "exp": time.time() - 1})
+    cache.put("e", {"user_id": "e"})
+    assert cache.get("d") is None and cache.get("e") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 3, "evictions": 2, "hit_rate": 0.25}
+
+def test_logout_revokes_only_that_token(client, test_user):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    other_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    assert client.post("/users/logout", headers=headers).status_code == 204
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.get("/users/me", headers=other_headers).status_code == 200
+    # Tokens the filter has never seen are answered without a table lookup
+    stats = revocation.revocations.stats()
+    assert stats["confirmed"] == 1 and stats["false_positives"] == 0
+
+def test_admin_revokes_all_tokens_of_a_user(client, test_user, admin_user):
+    user_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    assert client.post(f"/users/{admin_user.id}/revoke-tokens", headers=user_headers).status_code == 403
+    assert client.post("/users/9999/revoke-tokens", headers=admin_headers).status_code == 404
+
+    assert client.post(f"/users/{test_user.id}/revoke-tokens", headers=admin_headers).status_code == 204
+    assert client.get("/users/me", headers=user_headers).status_code == 401
+    # Signing in again afterwards works, and the admin's own token is unaffected
+    fresh_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    assert client.get("/users/me", headers=fresh_headers).status_code == 200
+    assert client.get("/metrics", headers=admin_headers).json()["token_revocations"]["confirmed"] == 1
+
+def test_revocations_propagate_to_every_worker_filter(db_session, test_user):
+    bus = revocation.LocalRevocationBus()
+    workers = [revocation.RevocationList(bus, capacity=1000), revocation.RevocationList(bus, capacity=1000)]
+    for worker in workers:
+        worker.start()
+    claims = {"sub": "a@example.com", "user_id": test_user.id, "jti": "abc", "exp": time.time() + 60, "iat": time.time()}
+    assert not any(worker.might_be_revoked(claims) for worker in workers)
+
+    db_session.add(models.RevokedToken(
+        jti="abc", user_id=test_user.id, revoked_at=revocation.utcnow(),
+        expires_at=revocation.utcnow() + timedelta(minutes=1)
+    ))
+    db_session.commit()
+    workers[0].announce(revocation.token_key("abc"))
+    assert all(worker.might_be_revoked(claims) and worker.confirm(db_session, claims) for worker in workers)
+
+    # A rebuild from the table restores what the worker heard on the bus
+    assert workers[1].rebuild(db_session) == 1
+    assert workers[1].might_be_revoked(claims)
+    assert not workers[1].might_be_revoked({**claims, "jti": "other", "user_id": test_user.id + 1})
+
+def test_get_users_me_is_slim_unless_expanded(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    group = [{"passenger_name": f"Passenger {i}", "passport_number": f"E10000{i}"} for i in range(3)]
+    booked_ids = [b["id"] for b in client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=headers).json()]
+
+    # The default profile costs only the authentication lookup
+    with max_statements(1):
+        profile = client.get("/users/me", headers=headers).json()
+    assert profile == {"email": "testuser@example.com", "id": test_user.id, "is_admin": False}
+
+    first = client.get("/users/me", params={"expand": "bookings", "limit": 2}, headers=headers)
+    assert [b["id"] for b in first.json()["bookings"]] == booked_ids[:2]
+    second = client.get(
+        "/users/me", params={"expand": "bookings", "limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=headers
+    )
+    assert [b["id"] for b in second.json()["bookings"]] == booked_ids[2:]
+    assert "X-Next-Cursor" not in second.headers
+    assert client.get("/users/me", params={"expand": "flights"}, headers=headers).status_code == 422
+
 # --- Flight Tests (MODIFIED) ---
 def test_add_flight_admin(client, admin_user):
     headers = get_auth_headers(client, "admin@example.com", "adminpass123")
@@ -301,4 +557,858 @@ def test_admin_cancel_other_booking_authorized(client, test_user, admin_user, te
     admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
     response = client.delete(f"/bookings/{booking_id}", headers=admin_headers)
     assert response.status_code == 200
-    assert response.json()["status"] == "Canceled"
\ No newline at end of file
+    assert response.json()["status"] == "Canceled"
+
+def test_book_ticket_decrements_seats_until_sold_out(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+
+    for i in range(test_flight.total_seats):
+        booking_data = {"passenger_name": f"Passenger {i}", "passport_number": f"P10000{i}"}
+        response = client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers)
+        assert response.status_code == 201
+
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == 0
+
+    booking_data = {"passenger_name": "Too Late", "passport_number": "P999999"}
+    response = client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No available seats"
+
+def test_book_ticket_flight_not_found(client, test_user):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+    response = client.post("/flights/9999/book", json=booking_data, headers=headers)
+    assert response.status_code == 404
+
+def test_cancel_booking_returns_seat(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+    response = client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers)
+    booking_id = response.json()["id"]
+    assert response.json()["flight"]["available_seats"] == test_flight.total_seats - 1
+
+    response = client.delete(f"/bookings/{booking_id}", headers=headers)
+    assert response.status_code == 200
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats
+
+# --- Query Count Tests ---
+# Reads of a user's bookings must not cost a query per booking or per flight
+
+BOOKING_READ_MAX_STATEMENTS = 3
+
+def test_booking_reads_do_not_query_per_flight(client, test_user, db_session):
+    for i in range(6):
+        flight = models.Flight(
+            flight_number=f"NQ{i}", airline="Eager Air", departure="A", destination="B",
+            departure_time=datetime(2030, 1, 1, 8, 0), arrival_time=datetime(2030, 1, 1, 10, 0),
+            total_seats=5, available_seats=4,
+        )
+        db_session.add(flight)
+        db_session.flush()
+        db_session.add(models.Booking(
+            passenger_name=f"Passenger {i}", passport_number=f"N100000{i}",
+            flight_id=flight.id, user_id=test_user.id,
+        ))
+    db_session.commit()
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+
+    with max_statements(BOOKING_READ_MAX_STATEMENTS):
+        bookings = client.get("/bookings/me", headers=headers).json()
+    assert [b["flight"]["flight_number"] for b in bookings] == [f"NQ{i}" for i in range(6)]
+    with max_statements(BOOKING_READ_MAX_STATEMENTS):
+        assert len(client.get("/users/me", params={"expand": "bookings"}, headers=headers).json()["bookings"]) == 6
+
+# --- Sparse Fieldset Tests ---
+
+def test_flight_reads_return_only_requested_fields(client, test_flight):
+    fields = "id,flight_number,available_seats"
+    with max_statements(2) as statements:
+        response = client.get("/flights/", params={"fields": fields})
+    assert response.json() == [{"id": test_flight.id, "flight_number": "LH456", "available_seats": 5}]
+    # The page query selects only the requested columns
+    assert "airline" not in statements[-1]
+
+    full = client.get("/flights/")
+    assert response.headers["ETag"] != full.headers["ETag"]
+    again = client.get("/flights/", params={"fields": fields}, headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+    details = client.get(f"/flights/{test_flight.id}", params={"fields": "available_seats,id"})
+    assert details.json() == {"available_seats": 5, "id": test_flight.id}
+    search = client.get("/flights/search", params={"departure": test_flight.departure, "fields": "flight_number"})
+    assert search.json() == [{"flight_number": "LH456"}]
+
+    assert client.get("/flights/", params={"fields": "id,password"}).status_code == 400
+    assert client.get("/flights/", params={"fields": ","}).status_code == 400
+
+def test_my_bookings_sparse_fields_page_and_nest(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    group = [{"passenger_name": f"Passenger {i}", "passport_number": f"F10000{i}"} for i in range(3)]
+    client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=headers)
+
+    first = client.get("/bookings/me", params={"fields": "passenger_name", "limit": 2}, headers=headers)
+    assert first.json() == [{"passenger_name": "Passenger 0"}, {"passenger_name": "Passenger 1"}]
+    second = client.get(
+        "/bookings/me", params={"fields": "passenger_name", "limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert second.json() == [{"passenger_name": "Passenger 2"}]
+
+    nested = client.get("/bookings/me", params={"fields": "status,flight", "limit": 1}, headers=headers).json()
+    assert nested[0]["status"] == "Booked"
+    assert nested[0]["flight"]["flight_number"] == "LH456"
+
+def test_my_bookings_relationship_only_fieldset(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    client.post(f"/flights/{test_flight.id}/book", json={"passenger_name": "Jane", "passport_number": "F200001"}, headers=headers)
+    response = client.get("/bookings/me", params={"fields": "flight"}, headers=headers)
+    assert response.status_code == 200
+    assert [list(item) for item in response.json()] == [["flight"]]
+    assert response.json()[0]["flight"]["id"] == test_flight.id
+
+# --- Seat Hold Tests ---
+
+def test_hold_and_confirm(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+
+    response = client.post(f"/flights/{test_flight.id}/holds", headers=headers)
+    assert response.status_code == 201
+    hold = response.json()
+    assert hold["status"] == "Held"
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 1
+
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+    response = client.post(f"/holds/{hold['id']}/confirm", json=booking_data, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["status"] == "Booked"
+
+    # Confirming does not take a second seat
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 1
+
+    response = client.post(f"/holds/{hold['id']}/confirm", json=booking_data, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Hold is already confirmed"
+
+def test_release_hold_returns_seat(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    hold_id = client.post(f"/flights/{test_flight.id}/holds", headers=headers).json()["id"]
+
+    response = client.delete(f"/holds/{hold_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "Released"
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats
+
+def test_expired_holds_are_swept(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    hold_ids = [
+        client.post(f"/flights/{test_flight.id}/holds", headers=headers).json()["id"]
+        for _ in range(2)
+    ]
+    db_session.query(models.SeatHold).filter(models.SeatHold.id == hold_ids[0]).update(
+        {"expires_at": holds.utcnow() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+    response = client.post(f"/holds/{hold_ids[0]}/confirm", json=booking_data, headers=headers)
+    assert response.status_code == 410
+
+    assert holds.release_expired_holds(db_session) == 1
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 1
+
+    response = client.post(f"/holds/{hold_ids[0]}/confirm", json=booking_data, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Hold is already expired"
+
+# --- Sharded Seat Counter Tests ---
+
+def test_sharded_flight_books_until_sold_out(client, admin_user, db_session):
+    headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    dep_time = datetime.now(UTC) + timedelta(days=1)
+    flight_data = {
+        "flight_number": "HOT001", "airline": "Hot Air", "departure": "A",
+        "destination": "B", "departure_time": dep_time.isoformat(),
+        "arrival_time": (dep_time + timedelta(hours=2)).isoformat(),
+        "total_seats": 7, "seat_shards": 3
+    }
+    response = client.post("/flights/", json=flight_data, headers=headers)
+    assert response.status_code == 201
+    flight_id = response.json()["id"]
+    shards = db_session.query(models.FlightSeatShard).filter_by(flight_id=flight_id).all()
+    assert sorted(s.available_seats for s in shards) == [2, 2, 3]
+
+    booking_ids = []
+    for i in range(7):
+        booking_data = {"passenger_name": f"Passenger {i}", "passport_number": f"S10000{i}"}
+        response = client.post(f"/flights/{flight_id}/book", json=booking_data, headers=headers)
+        assert response.status_code == 201
+        booking_ids.append(response.json()["id"])
+
+    booking_data = {"passenger_name": "Too Late", "passport_number": "S999999"}
+    response = client.post(f"/flights/{flight_id}/book", json=booking_data, headers=headers)
+    assert response.status_code == 400
+
+    client.delete(f"/bookings/{booking_ids[0]}", headers=headers)
+    assert inventory.compact_seat_shards(db_session) == 1
+    flight = db_session.query(models.Flight).filter_by(id=flight_id).one()
+    db_session.refresh(flight)
+    assert flight.available_seats == 1
+
+def test_stale_shard_count_is_corrected(client, test_user, test_flight, db_session):
+    # As if another worker had cached a deleted sharded flight under this id
+    inventory._shard_counts[test_flight.id] = 3
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    booking = {"passenger_name": "Test User", "passport_number": "P123456"}
+    assert client.post(f"/flights/{test_flight.id}/book", json=booking, headers=headers).status_code == 201
+    assert inventory._shard_counts[test_flight.id] == 1
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 1
+
+    # And the reverse: a sharded flight cached as unsharded
+    test_flight.seat_shards = 2
+    test_flight.shards = inventory.split_into_shards(test_flight.total_seats, 2)
+    db_session.commit()
+    other = {"passenger_name": "Other User", "passport_number": "P654321"}
+    assert client.post(f"/flights/{test_flight.id}/book", json=other, headers=headers).status_code == 201
+    assert inventory._shard_counts[test_flight.id] == 2
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 1
+
+def test_sharded_flight_reads_live_seat_count(client, admin_user, test_user):
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    user_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    dep_time = datetime.now(UTC) + timedelta(days=1)
+    flight_id = client.post("/flights/", json={
+        "flight_number": "HOT002", "airline": "Hot Air", "departure": "A",
+        "destination": "B", "departure_time": dep_time.isoformat(),
+        "arrival_time": (dep_time + timedelta(hours=2)).isoformat(),
+        "total_seats": 4, "seat_shards": 2
+    }, headers=admin_headers).json()["id"]
+
+    # No compaction runs in the tests, so these counts come from the shards
+    client.post(f"/flights/{flight_id}/book", json={"passenger_name": "P0", "passport_number": "H100000"}, headers=admin_headers)
+    assert client.get(f"/flights/{flight_id}").json()["available_seats"] == 3
+    group = [{"passenger_name": f"P{i}", "passport_number": f"H10000{i}"} for i in range(1, 4)]
+    assert client.post(f"/flights/{flight_id}/book/batch", json=group, headers=admin_headers).status_code == 201
+    assert client.get(f"/flights/{flight_id}").json()["available_seats"] == 0
+
+    waiting = {"passenger_name": "Waiting User", "passport_number": "H200000"}
+    assert client.post(f"/flights/{flight_id}/waitlist", json=waiting, headers=user_headers).status_code == 201
+
+# --- Batch Booking Tests ---
+
+def test_book_tickets_batch(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    group = [
+        {"passenger_name": f"Passenger {i}", "passport_number": f"G10000{i}"}
+        for i in range(3)
+    ]
+    response = client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=headers)
+    assert response.status_code == 201
+    data = response.json()
+    assert [b["passport_number"] for b in data] == [p["passport_number"] for p in group]
+    assert data[-1]["flight"]["available_seats"] == test_flight.total_seats - 3
+
+    # A group that reuses a booked passport is rejected as a whole
+    group = [
+        {"passenger_name": "New", "passport_number": "G200000"},
+        {"passenger_name": "Again", "passport_number": "G100001"},
+    ]
+    response = client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=headers)
+    assert response.status_code == 400
+    assert "G100001" in response.json()["detail"]
+
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 3
+    assert db_session.query(models.Booking).count() == 3
+
+def test_book_tickets_batch_not_enough_seats(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    group = [
+        {"passenger_name": f"Passenger {i}", "passport_number": f"G10000{i}"}
+        for i in range(test_flight.total_seats + 1)
+    ]
+    response = client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough available seats"
+
+# --- Idempotency Key Tests ---
+
+def test_book_ticket_idempotency_key_replays(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    headers["Idempotency-Key"] = "book-once"
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+
+    first = client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers)
+    assert first.status_code == 201
+    retry = client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats - 1
+    assert db_session.query(models.Booking).count() == 1
+
+    # The same key cannot be reused for a different request
+    other = {"passenger_name": "Someone Else", "passport_number": "P654321"}
+    response = client.post(f"/flights/{test_flight.id}/book", json=other, headers=headers)
+    assert response.status_code == 422
+
+def test_expired_idempotency_keys_are_reusable_and_pruned(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    headers["Idempotency-Key"] = "book-once"
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+    assert client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers).status_code == 201
+
+    stale = idempotency.expiry_cutoff() - timedelta(seconds=1)
+    db_session.query(models.IdempotencyRecord).update({"created_at": stale})
+    db_session.commit()
+    idempotency.clear()
+    # An expired key is a new request, even with a different body
+    other = {"passenger_name": "Someone Else", "passport_number": "P654321"}
+    response = client.post(f"/flights/{test_flight.id}/book", json=other, headers=headers)
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+
+    db_session.add(models.IdempotencyRecord(
+        user_id=test_user.id, key="old", request_hash="x", status_code=201,
+        response_body="{}", created_at=stale
+    ))
+    db_session.commit()
+    assert idempotency.prune_expired(db_session) == 1
+    assert db_session.query(models.IdempotencyRecord).count() == 1
+
+def test_cancel_booking_idempotency_key_replays(client, test_user, test_flight, db_session):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    booking_data = {"passenger_name": "Test User", "passport_number": "P123456"}
+    booking_id = client.post(f"/flights/{test_flight.id}/book", json=booking_data, headers=headers).json()["id"]
+
+    headers["Idempotency-Key"] = "cancel-once"
+    first = client.delete(f"/bookings/{booking_id}", headers=headers)
+    retry = client.delete(f"/bookings/{booking_id}", headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["status"] == "Canceled"
+
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == test_flight.total_seats
+
+# --- Waitlist Tests ---
+
+def test_cancel_promotes_waitlist_head(client, test_user, admin_user, test_flight, db_session):
+    user_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+
+    group = [
+        {"passenger_name": f"Passenger {i}", "passport_number": f"W10000{i}"}
+        for i in range(test_flight.total_seats)
+    ]
+    booked = client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=admin_headers).json()
+
+    waiting = {"passenger_name": "Waiting User", "passport_number": "W200000"}
+    response = client.post(f"/flights/{test_flight.id}/waitlist", json=waiting, headers=user_headers)
+    assert response.status_code == 201
+    assert response.json()["status"] == "Waiting"
+    entry_id = response.json()["id"]
+
+    response = client.delete(f"/bookings/{booked[0]['id']}", headers=admin_headers)
+    assert response.status_code == 200
+
+    entries = client.get("/waitlist/me", headers=user_headers).json()
+    assert entries[0]["id"] == entry_id
+    assert entries[0]["status"] == "Promoted"
+    bookings = client.get("/bookings/me", headers=user_headers).json()
+    assert [b["id"] for b in bookings] == [entries[0]["booking_id"]]
+
+    # The freed seat went to the waitlisted passenger, not back to the flight
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == 0
+
+def test_expired_hold_promotes_waitlist_head(client, test_user, admin_user, test_flight, db_session):
+    user_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    hold_id = client.post(f"/flights/{test_flight.id}/holds", headers=admin_headers).json()["id"]
+    group = [
+        {"passenger_name": f"Passenger {i}", "passport_number": f"W30000{i}"}
+        for i in range(test_flight.total_seats - 1)
+    ]
+    client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=admin_headers)
+    waiting = {"passenger_name": "Waiting User", "passport_number": "W400000"}
+    assert client.post(f"/flights/{test_flight.id}/waitlist", json=waiting, headers=user_headers).status_code == 201
+
+    db_session.query(models.SeatHold).filter(models.SeatHold.id == hold_id).update(
+        {"expires_at": holds.utcnow() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    promoted = []
+    assert holds.release_expired_holds(db_session, promoted=promoted) == 1
+    assert [b.passport_number for b in promoted] == ["W400000"]
+
+    entries = client.get("/waitlist/me", headers=user_headers).json()
+    assert entries[0]["status"] == "Promoted"
+    db_session.refresh(test_flight)
+    assert test_flight.available_seats == 0
+
+def test_delete_flight_with_confirmed_hold_and_promoted_waitlist(client, test_user, admin_user, test_flight, db_session):
+    # Foreign keys are enforced, so the bookings these rows point at must go cleanly
+    user_headers = get_auth_headers(client, "testuser@example.com", "password123")
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    hold_id = client.post(f"/flights/{test_flight.id}/holds", headers=admin_headers).json()["id"]
+    response = client.post(
+        f"/holds/{hold_id}/confirm", json={"passenger_name": "Held", "passport_number": "D100000"}, headers=admin_headers
+    )
+    assert response.status_code == 201
+    group = [
+        {"passenger_name": f"Passenger {i}", "passport_number": f"D20000{i}"}
+        for i in range(test_flight.total_seats - 1)
+    ]
+    booked = client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=admin_headers).json()
+    waiting = {"passenger_name": "Waiting User", "passport_number": "D300000"}
+    assert client.post(f"/flights/{test_flight.id}/waitlist", json=waiting, headers=user_headers).status_code == 201
+    client.delete(f"/bookings/{booked[0]['id']}", headers=admin_headers)
+    assert client.get("/waitlist/me", headers=user_headers).json()[0]["status"] == "Promoted"
+
+    response = client.delete(f"/flights/{test_flight.id}", headers=admin_headers)
+    assert response.status_code == 204
+    assert db_session.query(models.Booking).count() == 0
+    assert db_session.query(models.SeatHold).count() == 0
+    assert db_session.query(models.WaitlistEntry).count() == 0
+
+def test_join_waitlist_requires_sold_out_flight(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    waiting = {"passenger_name": "Waiting User", "passport_number": "W200000"}
+    response = client.post(f"/flights/{test_flight.id}/waitlist", json=waiting, headers=headers)
+    assert response.status_code == 400
+
+# --- Flight Search Tests ---
+
+def test_search_flights_by_route_and_date(client, db_session):
+    base = datetime(2030, 1, 1, 8, 0)
+    for number, departure, destination, days, seats in [
+        ("S1", "LHR", "JFK", 0, 10),
+        ("S2", "LHR", "JFK", 2, 10),
+        ("S3", "LHR", "JFK", 5, 10),
+        ("S4", "LHR", "CDG", 2, 10),
+        ("S5", "LHR", "JFK", 3, 0),
+    ]:
+        db_session.add(models.Flight(
+            flight_number=number, airline="Search Air", departure=departure, destination=destination,
+            departure_time=base + timedelta(days=days),
+            arrival_time=base + timedelta(days=days, hours=7),
+            total_seats=10, available_seats=seats
+        ))
+    db_session.commit()
+
+    response = client.get("/flights/search", params={
+        "departure": "LHR", "destination": "JFK",
+        "date_from": (base + timedelta(days=1)).isoformat(),
+        "date_to": (base + timedelta(days=6)).isoformat(),
+    })
+    assert response.status_code == 200
+    # S5 is sold out, so the default min_seats=1 leaves it out
+    assert [f["flight_number"] for f in response.json()] == ["S2", "S3"]
+
+    response = client.get("/flights/search", params={"destination": "JFK", "min_seats": 0})
+    assert [f["flight_number"] for f in response.json()] == ["S1", "S2", "S5", "S3"]
+
+    # Offsets are honoured: 13:00+05:00 is the 08:00 UTC departure of S1
+    response = client.get("/flights/search", params={
+        "departure": "LHR", "destination": "JFK",
+        "date_from": "2030-01-01T13:00:00+05:00", "date_to": "2030-01-03T13:00:00+05:00",
+    })
+    assert [f["flight_number"] for f in response.json()] == ["S1", "S2"]
+
+# --- Connection Search Tests ---
+
+def test_search_connections_ranks_by_arrival(client, admin_user, db_session):
+    base = datetime(2030, 1, 1, 8, 0)
+    def add(number, departure, destination, dep_hours, arr_hours, seats=10):
+        db_session.add(models.Flight(
+            flight_number=number, airline="Hop Air", departure=departure, destination=destination,
+            departure_time=base + timedelta(hours=dep_hours),
+            arrival_time=base + timedelta(hours=arr_hours),
+            total_seats=10, available_seats=seats
+        ))
+    add("D1", "AAA", "CCC", 0, 10)      # direct, arrives last
+    add("H1", "AAA", "BBB", 0, 2)
+    add("H2", "BBB", "CCC", 2.5, 4)     # too tight after H1 with a 45 minute minimum
+    add("H3", "BBB", "CCC", 3, 5)
+    add("H4", "BBB", "CCC", 4, 6, seats=0)
+    add("H5", "BBB", "AAA", 3, 4)       # back to the origin, never used
+    db_session.commit()
+
+    params = {"departure": "AAA", "destination": "CCC", "date_from": base.isoformat()}
+    response = client.get("/flights/connections", params=params)
+    assert response.status_code == 200
+    itineraries = response.json()
+    assert [[leg["flight_number"] for leg in i["legs"]] for i in itineraries] == [["H1", "H3"], ["D1"]]
+    assert itineraries[0]["stops"] == 1
+    assert itineraries[0]["duration_minutes"] == 300
+
+    response = client.get("/flights/connections", params={**params, "max_legs": 1})
+    assert [[leg["flight_number"] for leg in i["legs"]] for i in response.json()] == [["D1"]]
+
+    # Seats are read from the database, not the loaded graph: a flight that
+    # was full at load time shows up once seats free, and a full one is
+    # replaced by the next best itinerary
+    db_session.query(models.Flight).filter(models.Flight.flight_number == "H4").update({"available_seats": 2})
+    db_session.query(models.Flight).filter(models.Flight.flight_number == "H3").update({"available_seats": 0})
+    db_session.commit()
+    response = client.get("/flights/connections", params={**params, "limit": 2})
+    assert [[leg["flight_number"] for leg in i["legs"]] for i in response.json()] == [["H1", "H4"], ["D1"]]
+    response = client.get("/flights/connections", params={**params, "passengers": 3})
+    assert [[leg["flight_number"] for leg in i["legs"]] for i in response.json()] == [["D1"]]
+    db_session.query(models.Flight).filter(models.Flight.flight_number == "H4").update({"available_seats": 0})
+    db_session.query(models.Flight).filter(models.Flight.flight_number == "H3").update({"available_seats": 10})
+    db_session.commit()
+
+    # Flights added through the API are visible without a rebuild
+    headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    response = client.post("/flights/", json={
+        "flight_number": "D2", "airline": "Hop Air", "departure": "AAA", "destination": "CCC",
+        "departure_time": (base + timedelta(hours=1)).isoformat(),
+        "arrival_time": (base + timedelta(hours=3)).isoformat(),
+        "total_seats": 5
+    }, headers=headers)
+    assert response.status_code == 201
+    new_id = response.json()["id"]
+    response = client.get("/flights/connections", params=params)
+    assert [i["legs"][0]["flight_number"] for i in response.json()][0] == "D2"
+
+    client.delete(f"/flights/{new_id}", headers=headers)
+    response = client.get("/flights/connections", params=params)
+    assert "D2" not in [i["legs"][0]["flight_number"] for i in response.json()]
+
+# --- Autocomplete Tests ---
+
+def test_autocomplete_counts_and_updates(client, admin_user, db_session):
+    base = datetime(2030, 1, 1, 8, 0)
+    for number, departure, airline in [
+        ("AC1", "London", "Sky Air"), ("AC2", "London", "Sky Air"),
+        ("AC3", "Los Angeles", "Sun Air"), ("AC4", "Lisbon", "Sky Air"),
+    ]:
+        db_session.add(models.Flight(
+            flight_number=number, airline=airline, departure=departure, destination="Paris",
+            departure_time=base, arrival_time=base + timedelta(hours=2),
+            total_seats=10, available_seats=10
+        ))
+    db_session.commit()
+
+    response = client.get("/flights/autocomplete", params={"field": "departure", "prefix": "lo"})
+    assert response.status_code == 200
+    assert response.json() == [{"value": "London", "count": 2}, {"value": "Los Angeles", "count": 1}]
+
+    headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    response = client.post("/flights/", json={
+        "flight_number": "AC5", "airline": "Lone Air", "departure": "Lome", "destination": "Paris",
+        "departure_time": base.isoformat(), "arrival_time": (base + timedelta(hours=2)).isoformat(),
+        "total_seats": 5
+    }, headers=headers)
+    new_id = response.json()["id"]
+    response = client.get("/flights/autocomplete", params={"field": "departure", "prefix": "LO"})
+    assert [s["value"] for s in response.json()] == ["London", "Lome", "Los Angeles"]
+
+    client.delete(f"/flights/{new_id}", headers=headers)
+    response = client.get("/flights/autocomplete", params={"field": "airline", "prefix": "l"})
+    assert response.json() == []
+    response = client.get("/flights/autocomplete", params={"field": "airline", "prefix": "s", "limit": 1})
+    assert response.json() == [{"value": "Sky Air", "count": 3}]
+
+    response = client.get("/flights/autocomplete", params={"field": "flight_number", "prefix": "A"})
+    assert response.status_code == 422
+
+# --- Flight Cache Tests ---
+
+def test_flight_details_cache_invalidated_by_booking(client, test_user, admin_user, test_flight):
+    for _ in range(2):
+        response = client.get(f"/flights/{test_flight.id}")
+        assert response.status_code == 200
+        assert response.json()["available_seats"] == 5
+    assert caching.flight_cache.stats() == {"hits": 1, "misses": 1, "invalidations": 0}
+
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    booking = client.post(f"/flights/{test_flight.id}/book", json={
+        "passenger_name": "Cache Test", "passport_number": "C1234567"
+    }, headers=headers).json()
+    assert client.get(f"/flights/{test_flight.id}").json()["available_seats"] == 4
+
+    client.delete(f"/bookings/{booking['id']}", headers=headers)
+    assert client.get(f"/flights/{test_flight.id}").json()["available_seats"] == 5
+
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    client.delete(f"/flights/{test_flight.id}", headers=admin_headers)
+    assert client.get(f"/flights/{test_flight.id}").status_code == 404
+
+    stats = client.get("/metrics", headers=admin_headers).json()["flight_cache"]
+    assert stats["invalidations"] == 3
+    assert client.get("/metrics", headers=headers).status_code == 403
+
+def test_local_cache_backend_evicts_and_expires():
+    backend = caching.LocalCacheBackend(max_size=2)
+    backend.set("1", "a", ttl=60)
+    backend.set("2", "b", ttl=60)
+    backend.get("1")
+    backend.set("3", "c", ttl=60)
+    assert backend.get("2") is None
+    assert backend.get("1") == "a"
+    backend.set("4", "d", ttl=0)
+    assert backend.get("4") is None
+
+# --- ETag Tests ---
+
+def test_flight_reads_return_304_until_seats_change(client, test_user, test_flight):
+    for path in ["/flights/", f"/flights/{test_flight.id}"]:
+        first = client.get(path)
+        etag = first.headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    list_etag = client.get("/flights/").headers["ETag"]
+    details_etag = client.get(f"/flights/{test_flight.id}").headers["ETag"]
+    client.post(f"/flights/{test_flight.id}/book", json={
+        "passenger_name": "ETag Test", "passport_number": "E1234567"
+    }, headers=headers)
+
+    response = client.get("/flights/", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["available_seats"] == 4
+    response = client.get(f"/flights/{test_flight.id}", headers={"If-None-Match": details_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != details_etag
+
+def test_my_bookings_etag_tracks_bookings_and_flights(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    booking = client.post(f"/flights/{test_flight.id}/book", json={
+        "passenger_name": "ETag Test", "passport_number": "E1234567"
+    }, headers=headers).json()
+
+    etag = client.get("/bookings/me", headers=headers).headers["ETag"]
+    response = client.get("/bookings/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Another passenger on the same flight changes the embedded seat count
+    client.post(f"/flights/{test_flight.id}/holds", headers=headers)
+    response = client.get("/bookings/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    client.delete(f"/bookings/{booking['id']}", headers=headers)
+    response = client.get("/bookings/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["status"] == "Canceled"
+
+# --- Single-Flight Tests ---
+
+def test_single_flight_shares_one_call():
+    group = singleflight.SingleFlight()
+    release = threading.Event()
+    calls, results = [], []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "flight"
+
+    leader = threading.Thread(target=lambda: results.append(group.do("k", load)))
+    leader.start()
+    while group.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    followers = [threading.Thread(target=lambda: results.append(group.do("k", load))) for _ in range(5)]
+    for t in followers:
+        t.start()
+    while group.stats()["coalesced"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert calls == [1]
+    assert results == ["flight"] * 6
+    assert group.stats() == {"executions": 1, "coalesced": 5, "in_flight": 0}
+
+    # Errors are shared too, and the key is free again afterwards
+    def fail():
+        raise ValueError("boom")
+    with pytest.raises(ValueError):
+        group.do("k", fail)
+    assert group.do("k", lambda: "again") == "again"
+
+def test_single_flight_coalesces_on_the_event_loop():
+    # How DB_ASYNC mode calls it: from greenlets inside AsyncSession.run_sync
+    group = singleflight.SingleFlight()
+    calls = []
+
+    async def run():
+        release = asyncio.Event()
+
+        def load():
+            calls.append(1)
+            await_only(release.wait())
+            return "flight"
+
+        tasks = [asyncio.create_task(greenlet_spawn(group.do, "k", load)) for _ in range(3)]
+        while group.stats()["coalesced"] < 2:
+            await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(run()) == ["flight"] * 3
+    assert calls == [1]
+
+def test_metrics_report_single_flight(client, admin_user, test_flight):
+    client.get(f"/flights/{test_flight.id}")
+    client.get("/flights/")
+    headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    stats = client.get("/metrics", headers=headers).json()["single_flight"]
+    assert stats == {"executions": 2, "coalesced": 0, "in_flight": 0}
+
+# --- Database Engine Tests ---
+
+def test_read_session_rejects_writes(db_session):
+    read_db = TestingReadSessionLocal()
+    try:
+        read_db.add(models.User(email="reader@example.com", hashed_password="x"))
+        with pytest.raises(DBAPIError):
+            read_db.commit()
+    finally:
+        read_db.rollback()
+        read_db.close()
+
+@pytest.mark.skipif(not SQLALCHEMY_DATABASE_URL.startswith("sqlite"), reason="SQLite pragmas")
+def test_sqlite_connections_use_wal_profile(db_session):
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_in_memory_sqlite_engines_skip_pool_sizing(url):
+    memory_engine = create_db_engine(url)
+    with memory_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT 1").scalar() == 1
+    memory_engine.dispose()
+    create_async_db_engine(url).sync_engine.dispose()
+
+# --- Read Replica Tests ---
+
+@pytest.fixture(scope="function")
+def stale_replica(db_session, monkeypatch):
+    """Routes GET endpoints through a replica that never receives writes, like one lagging forever."""
+    replica_url = "sqlite:///./test_replica.db"
+    replica = create_db_engine(replica_url)
+    Base.metadata.drop_all(bind=replica)
+    Base.metadata.create_all(bind=replica)
+    if database.DB_ASYNC:
+        replicas = database.ReplicaSet([create_async_db_engine(replica_url, read_only=True).sync_engine])
+        monkeypatch.setattr(database, "AsyncReadSessionLocal", async_sessionmaker(
+            sync_session_class=database.RoutingSession, autoflush=False,
+            primary=async_read_engine.sync_engine, replicas=replicas,
+        ))
+    else:
+        replicas = database.ReplicaSet([create_db_engine(replica_url, read_only=True)])
+        monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(
+            class_=database.RoutingSession, autoflush=False, primary=read_engine, replicas=replicas
+        ))
+    monkeypatch.delitem(app.dependency_overrides, get_read_db)
+    yield
+    for replica_engine in [replica, *replicas.engines]:
+        replica_engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(f"test_replica.db{suffix}"):
+            os.remove(f"test_replica.db{suffix}")
+
+def test_replica_set_selection(db_session):
+    first, second = (create_db_engine(SQLALCHEMY_DATABASE_URL, read_only=True) for _ in range(2))
+    try:
+        round_robin = database.ReplicaSet([first, second])
+        assert [round_robin.pick() for _ in range(4)] == [first, second, first, second]
+        least_connections = database.ReplicaSet([first, second], "least_connections")
+        with first.connect():
+            assert least_connections.pick() is second
+        with second.connect():
+            assert least_connections.pick() is first
+        with pytest.raises(ValueError):
+            database.ReplicaSet([first], "random")
+    finally:
+        first.dispose()
+        second.dispose()
+
+def test_reads_follow_own_writes_despite_replica_lag(client, test_user, admin_user, test_flight, stale_replica):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    admin_headers = get_auth_headers(client, "admin@example.com", "adminpass123")
+    # The replica has not seen the flight yet
+    assert client.get(f"/flights/{test_flight.id}", headers=headers).status_code == 404
+
+    booking = {"passenger_name": "Lag Test", "passport_number": "L1234567"}
+    assert client.post(f"/flights/{test_flight.id}/book", json=booking, headers=headers).status_code == 201
+
+    # The booker now reads from the primary...
+    assert [b["passenger_name"] for b in client.get("/bookings/me", headers=headers).json()] == ["Lag Test"]
+    assert len(client.get("/users/me", params={"expand": "bookings"}, headers=headers).json()["bookings"]) == 1
+    assert client.get("/flights/", headers=headers).json()[0]["available_seats"] == 4
+    # ...while everyone else stays on the replica
+    assert client.get("/flights/", headers=admin_headers).json() == []
+    assert client.get("/flights/").json() == []
+
+    # Once the window passes, the booker is back on the replica
+    database.read_your_writes.clear()
+    assert client.get("/bookings/me", headers=headers).json() == []
+
+# --- Cursor Pagination Tests ---
+
+def test_list_flights_cursor_pagination(client, db_session):
+    base = datetime(2030, 1, 1, 8, 0)
+    # Two flights share a departure time so the id tie-breaker matters
+    for i, hours in enumerate([5, 1, 3, 3, 2]):
+        db_session.add(models.Flight(
+            flight_number=f"PG{i}", airline="Page Air", departure="A", destination="B",
+            departure_time=base + timedelta(hours=hours),
+            arrival_time=base + timedelta(hours=hours + 1),
+            total_seats=10, available_seats=10
+        ))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/flights/", params=params)
+        assert response.status_code == 200
+        seen += [f["flight_number"] for f in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == ["PG1", "PG4", "PG2", "PG3", "PG0"]
+
+    # limit=4 and limit=5 read the same five rows (one is the look-ahead),
+    # but must not share an ETag or a coalesced page
+    four = client.get("/flights/", params={"limit": 4})
+    five = client.get("/flights/", params={"limit": 5})
+    assert four.headers["ETag"] != five.headers["ETag"]
+    assert len(four.json()) == 4 and len(five.json()) == 5
+
+    for bad_cursor in ["not-a-cursor", pagination.encode_cursor(1, 2)]:
+        response = client.get("/flights/", params={"cursor": bad_cursor})
+        assert response.status_code == 400
+
+def test_get_my_bookings_cursor_pagination(client, test_user, test_flight):
+    headers = get_auth_headers(client, "testuser@example.com", "password123")
+    group = [
+        {"passenger_name": f"Passenger {i}", "passport_number": f"C10000{i}"}
+        for i in range(3)
+    ]
+    booked_ids = [b["id"] for b in client.post(f"/flights/{test_flight.id}/book/batch", json=group, headers=headers).json()]
+
+    first = client.get("/bookings/me", params={"limit": 2}, headers=headers)
+    assert [b["id"] for b in first.json()] == booked_ids[:2]
+    second = client.get("/bookings/me", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+    assert [b["id"] for b in second.json()] == booked_ids[2:]
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,71 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import database
+import etags
+import models
+
+# --- Waitlist ---
+
+def _transition_entry(db: Session, entry_id: int, new_status: str, **values) -> bool:
+    """Moves a waiting entry on with a guarded UPDATE, so it is served once."""
+    updated = db.query(models.WaitlistEntry).filter(
+        models.WaitlistEntry.id == entry_id,
+        models.WaitlistEntry.status == "Waiting"
+    ).update({"status": new_status, **values}, synchronize_session=False)
+    return updated > 0
+
+def promote_next(db: Session, flight_id: int) -> Optional[models.Booking]:
+    """
+    Hands a freed seat to the head of the flight's waitlist, inside the
+    caller's transaction. Returns the new booking, or None if nobody is
+    waiting (the caller should then return the seat to inventory).
+    """
+    while True:
+        entry = db.query(models.WaitlistEntry).filter(
+            models.WaitlistEntry.flight_id == flight_id,
+            models.WaitlistEntry.status == "Waiting"
+        ).order_by(models.WaitlistEntry.id).with_for_update(skip_locked=True).first()
+        if entry is None:
+            return None
+
+        # Entries whose passport got a booking on this flight since joining
+        # would violate _passport_flight_uc, so they are skipped.
+        already_booked = db.query(models.Booking.id).filter(
+            models.Booking.flight_id == flight_id,
+            models.Booking.passport_number == entry.passport_number
+        ).first()
+        if already_booked:
+            _transition_entry(db, entry.id, "Skipped")
+            continue
+
+        if not _transition_entry(db, entry.id, "Promoted"):
+            # Another cancellation promoted this entry first
+            continue
+
+        db_booking = models.Booking(
+            passenger_name=entry.passenger_name,
+            passport_number=entry.passport_number,
+            flight_id=flight_id,
+            user_id=entry.user_id,
+            status="Booked"
+        )
+        db.add(db_booking)
+        etags.bump_bookings_version(db, entry.user_id)
+        db.flush()
+        entry.booking_id = db_booking.id
+        return db_booking
+
+def leave(db: Session, entry_id: int) -> bool:
+    return _transition_entry(db, entry_id, "Left")
+
+def new_entry(flight_id: int, user_id: int, passenger_name: str, passport_number: str) -> models.WaitlistEntry:
+    return models.WaitlistEntry(
+        flight_id=flight_id,
+        user_id=user_id,
+        passenger_name=passenger_name,
+        passport_number=passport_number,
+        status="Waiting",
+        created_at=database.utcnow()
+    )
@@ -16,8 +16,9 @@ from pydantic import validate_call, Field, StrictFloat, StrictStr, StrictInt
 from typing import Any, Dict, List, Optional, Tuple, Union
 from typing_extensions import Annotated
 
-from pydantic import StrictInt
-from typing import List
+from pydantic import Field, StrictInt, StrictStr
+from typing import List, Optional
+from typing_extensions import Annotated
 from openapi_client.models.booking_create import BookingCreate
 from openapi_client.models.booking_response import BookingResponse
 
@@ -328,6 +329,298 @@ class BookingsApi:
 
 
 
+    @validate_call
+    def book_tickets_batch_flights_flight_id_book_batch_post(
+        self,
+        flight_id: StrictInt,
+        booking_create: Annotated[List[BookingCreate], Field(min_length=1, max_length=200)],
+        _request_timeout: Union[
+            None,
+            Annotated[StrictFloat, Field(gt=0)],
+            Tuple[
+                Annotated[StrictFloat, Field(gt=0)],
+                Annotated[StrictFloat, Field(gt=0)]
+            ]
+        ] = None,
+        _request_auth: Optional[Dict[StrictStr, Any]] = None,
+        _content_type: Optional[StrictStr] = None,
+        _headers: Optional[Dict[StrictStr, Any]] = None,
+        _host_index: Annotated[StrictInt, Field(ge=0, le=0)] = 0,
+    ) -> List[BookingResponse]:
+        """Book Tickets Batch
+
+        Book several passengers on one flight in a single transaction. Either every passenger is booked or none are.
+
+        :param flight_id: (required)
+        :type flight_id: int
+        :param booking_create: (required)
+        :type booking_create: List[BookingCreate]
+        :param _request_timeout: timeout setting for this request. If one
+                                 number provided, it will be total request
+                                 timeout. It can also be a pair (tuple) of
+                                 (connection, read) timeouts.
+        :type _request_timeout: int, tuple(int, int), optional
+        :param _request_auth: set to override the auth_settings for an a single
+                              request; this effectively ignores the
+                              authentication in the spec for a single request.
+        :type _request_auth: dict, optional
+        :param _content_type: force content-type for the request.
+        :type _content_type: str, Optional
+        :param _headers: set to override the headers for a single
+                         request; this effectively ignores the headers
+                         in the spec for a single request.
+        :type _headers: dict, optional
+        :param _host_index: set to override the host_index for a single
+                            request; this effectively ignores the host_index
+                            in the spec for a single request.
+        :type _host_index: int, optional
+        :return: Returns the result object.
+        """ # noqa: E501
+
+        _param = self._book_tickets_batch_flights_flight_id_book_batch_post_serialize(
+            flight_id=flight_id,
+            booking_create=booking_create,
+            _request_auth=_request_auth,
+            _content_type=_content_type,
+            _headers=_headers,
+            _host_index=_host_index
+        )
+
+        _response_types_map: Dict[str, Optional[str]] = {
+            '201': "List[BookingResponse]",
+            '422': "HTTPValidationError",
+        }
+        response_data = self.api_client.call_api(
+            *_param,
+            _request_timeout=_request_timeout
+        )
+        response_data.read()
+        return self.api_client.response_deserialize(
+            response_data=response_data,
+            response_types_map=_response_types_map,
+        ).data
+
+
+    @validate_call
+    def book_tickets_batch_flights_flight_id_book_batch_post_with_http_info(
+        self,
+        flight_id: StrictInt,
+        booking_create: Annotated[List[BookingCreate], Field(min_length=1, max_length=200)],
+        _request_timeout: Union[
+            None,
+            Annotated[StrictFloat, Field(gt=0)],
+            Tuple[
+                Annotated[StrictFloat, Field(gt=0)],
+                Annotated[StrictFloat, Field(gt=0)]
+            ]
+        ] = None,
+        _request_auth: Optional[Dict[StrictStr, Any]] = None,
+        _content_type: Optional[StrictStr] = None,
+        _headers: Optional[Dict[StrictStr, Any]] = None,
+        _host_index: Annotated[StrictInt, Field(ge=0, le=0)] = 0,
+    ) -> ApiResponse[List[BookingResponse]]:
+        """Book Tickets Batch
+
+        Book several passengers on one flight in a single transaction. Either every passenger is booked or none are.
+
+        :param flight_id: (required)
+        :type flight_id: int
+        :param booking_create: (required)
+        :type booking_create: List[BookingCreate]
+        :param _request_timeout: timeout setting for this request. If one
+                                 number provided, it will be total request
+                                 timeout. It can also be a pair (tuple) of
+                                 (connection, read) timeouts.
+        :type _request_timeout: int, tuple(int, int), optional
+        :param _request_auth: set to override the auth_settings for an a single
+                              request; this effectively ignores the
+                              authentication in the spec for a single request.
+        :type _request_auth: dict, optional
+        :param _content_type: force content-type for the request.
+        :type _content_type: str, Optional
+        :param _headers: set to override the headers for a single
+                         request; this effectively ignores the headers
+                         in the spec for a single request.
+        :type _headers: dict, optional
+        :param _host_index: set to override the host_index for a single
+                            request; this effectively ignores the host_index
+                            in the spec for a single request.
+        :type _host_index: int, optional
+        :return: Returns the result object.
+        """ # noqa: E501
+
+        _param = self._book_tickets_batch_flights_flight_id_book_batch_post_serialize(
+            flight_id=flight_id,
+            booking_create=booking_create,
+            _request_auth=_request_auth,
+            _content_type=_content_type,
+            _headers=_headers,
+            _host_index=_host_index
+        )
+
+        _response_types_map: Dict[str, Optional[str]] = {
+            '201': "List[BookingResponse]",
+            '422': "HTTPValidationError",
+        }
+        response_data = self.api_client.call_api(
+            *_param,
+            _request_timeout=_request_timeout
+        )
+        response_data.read()
+        return self.api_client.response_deserialize(
+            response_data=response_data,
+            response_types_map=_response_types_map,
+        )
+
+
+    @validate_call
+    def book_tickets_batch_flights_flight_id_book_batch_post_without_preload_content(
+        self,
+        flight_id: StrictInt,
+        booking_create: Annotated[List[BookingCreate], Field(min_length=1, max_length=200)],
+        _request_timeout: Union[
+            None,
+            Annotated[StrictFloat, Field(gt=0)],
+            Tuple[
+                Annotated[StrictFloat, Field(gt=0)],
+                Annotated[StrictFloat, Field(gt=0)]
+            ]
+        ] = None,
+        _request_auth: Optional[Dict[StrictStr, Any]] = None,
+        _content_type: Optional[StrictStr] = None,
+        _headers: Optional[Dict[StrictStr, Any]] = None,
+        _host_index: Annotated[StrictInt, Field(ge=0, le=0)] = 0,
+    ) -> RESTResponseType:
+        """Book Tickets Batch
+
+        Book several passengers on one flight in a single transaction. Either every passenger is booked or none are.
+
+        :param flight_id: (required)
+        :type flight_id: int
+        :param booking_create: (required)
+        :type booking_create: List[BookingCreate]
+        :param _request_timeout: timeout setting for this request. If one
+                                 number provided, it will be total request
+                                 timeout. It can also be a pair (tuple) of
+                                 (connection, read) timeouts.
+        :type _request_timeout: int, tuple(int, int), optional
+        :param _request_auth: set to override the auth_settings for an a single
+                              request; this effectively ignores the
+                              authentication in the spec for a single request.
+        :type _request_auth: dict, optional
+        :param _content_type: force content-type for the request.
+        :type _content_type: str, Optional
+        :param _headers: set to override the headers for a single
+                         request; this effectively ignores the headers
+                         in the spec for a single request.
+        :type _headers: dict, optional
+        :param _host_index: set to override the host_index for a single
+                            request; this effectively ignores the host_index
+                            in the spec for a single request.
+        :type _host_index: int, optional
+        :return: Returns the result object.
+        """ # noqa: E501
+
+        _param = self._book_tickets_batch_flights_flight_id_book_batch_post_serialize(
+            flight_id=flight_id,
+            booking_create=booking_create,
+            _request_auth=_request_auth,
+            _content_type=_content_type,
+            _headers=_headers,
+            _host_index=_host_index
+        )
+
+        _response_types_map: Dict[str, Optional[str]] = {
+            '201': "List[BookingResponse]",
+            '422': "HTTPValidationError",
+        }
+        response_data = self.api_client.call_api(
+            *_param,
+            _request_timeout=_request_timeout
+        )
+        return response_data.response
+
+
+    def _book_tickets_batch_flights_flight_id_book_batch_post_serialize(
+        self,
+        flight_id,
+        booking_create,
+        _request_auth,
+        _content_type,
+        _headers,
+        _host_index,
+    ) -> RequestSerialized:
+
+        _host = None
+
+        _collection_formats: Dict[str, str] = {
+        }
+
+        _path_params: Dict[str, str] = {}
+        _query_params: List[Tuple[str, str]] = []
+        _header_params: Dict[str, Optional[str]] = _headers or {}
+        _form_params: List[Tuple[str, str]] = []
+        _files: Dict[
+            str, Union[str, bytes, List[str], List[bytes], List[Tuple[str, bytes]]]
+        ] = {}
+        _body_params: Optional[bytes] = None
+
+        # process the path parameters
+        if flight_id is not None:
+            _path_params['flight_id'] = flight_id
+        # process the query parameters
+        # process the header parameters
+        # process the form parameters
+        # process the body parameter
+        if booking_create is not None:
+            _body_params = booking_create
+
+
+        # set the HTTP header `Accept`
+        if 'Accept' not in _header_params:
+            _header_params['Accept'] = self.api_client.select_header_accept(
+                [
+                    'application/json'
+                ]
+            )
+
+        # set the HTTP header `Content-Type`
+        if _content_type:
+            _header_params['Content-Type'] = _content_type
+        else:
+            _default_content_type = (
+                self.api_client.select_header_content_type(
+                    [
+                        'application/json'
+                    ]
+                )
+            )
+            if _default_content_type is not None:
+                _header_params['Content-Type'] = _default_content_type
+
+        # authentication setting
+        _auth_settings: List[str] = [
+            'OAuth2PasswordBearer'
+        ]
+
+        return self.api_client.param_serialize(
+            method='POST',
+            resource_path='/flights/{flight_id}/book/batch',
+            path_params=_path_params,
+            query_params=_query_params,
+            header_params=_header_params,
+            body=_body_params,
+            post_params=_form_params,
+            files=_files,
+            auth_settings=_auth_settings,
+            collection_formats=_collection_formats,
+            _host=_host,
+            _request_auth=_request_auth
+        )
+
+
+
+
     @validate_call
     def cancel_booking_bookings_booking_id_delete(
         self,
@@ -595,6 +888,9 @@ class BookingsApi:
     @validate_call
     def get_my_bookings_bookings_me_get(
         self,
+        limit: Optional[Annotated[int, Field(le=500, strict=True, ge=1)]] = None,
+        cursor: Optional[StrictStr] = None,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -610,7 +906,14 @@ class BookingsApi:
     ) -> List[BookingResponse]:
         """Get My Bookings
 
+        List the current user's bookings, oldest first. Follow the `X-Next-Cursor` response header with `cursor=` to page through.
 
+        :param limit:
+        :type limit: int
+        :param cursor:
+        :type cursor: str
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -634,6 +937,9 @@ class BookingsApi:
         """ # noqa: E501
 
         _param = self._get_my_bookings_bookings_me_get_serialize(
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -642,6 +948,7 @@ class BookingsApi:
 
         _response_types_map: Dict[str, Optional[str]] = {
             '200': "List[BookingResponse]",
+            '422': "HTTPValidationError",
         }
         response_data = self.api_client.call_api(
             *_param,
@@ -657,6 +964,9 @@ class BookingsApi:
     @validate_call
     def get_my_bookings_bookings_me_get_with_http_info(
         self,
+        limit: Optional[Annotated[int, Field(le=500, strict=True, ge=1)]] = None,
+        cursor: Optional[StrictStr] = None,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -672,7 +982,14 @@ class BookingsApi:
     ) -> ApiResponse[List[BookingResponse]]:
         """Get My Bookings
 
+        List the current user's bookings, oldest first. Follow the `X-Next-Cursor` response header with `cursor=` to page through.
 
+        :param limit:
+        :type limit: int
+        :param cursor:
+        :type cursor: str
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -696,6 +1013,9 @@ class BookingsApi:
         """ # noqa: E501
 
         _param = self._get_my_bookings_bookings_me_get_serialize(
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -704,6 +1024,7 @@ class BookingsApi:
 
         _response_types_map: Dict[str, Optional[str]] = {
             '200': "List[BookingResponse]",
+            '422': "HTTPValidationError",
         }
         response_data = self.api_client.call_api(
             *_param,
@@ -719,6 +1040,9 @@ class BookingsApi:
     @validate_call
     def get_my_bookings_bookings_me_get_without_preload_content(
         self,
+        limit: Optional[Annotated[int, Field(le=500, strict=True, ge=1)]] = None,
+        cursor: Optional[StrictStr] = None,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -734,7 +1058,14 @@ class BookingsApi:
     ) -> RESTResponseType:
         """Get My Bookings
 
+        List the current user's bookings, oldest first. Follow the `X-Next-Cursor` response header with `cursor=` to page through.
 
+        :param limit:
+        :type limit: int
+        :param cursor:
+        :type cursor: str
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -758,6 +1089,9 @@ class BookingsApi:
         """ # noqa: E501
 
         _param = self._get_my_bookings_bookings_me_get_serialize(
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -766,6 +1100,7 @@ class BookingsApi:
 
         _response_types_map: Dict[str, Optional[str]] = {
             '200': "List[BookingResponse]",
+            '422': "HTTPValidationError",
         }
         response_data = self.api_client.call_api(
             *_param,
@@ -776,6 +1111,9 @@ class BookingsApi:
 
     def _get_my_bookings_bookings_me_get_serialize(
         self,
+        limit,
+        cursor,
+        fields,
         _request_auth,
         _content_type,
         _headers,
@@ -798,6 +1136,18 @@ class BookingsApi:
 
         # process the path parameters
         # process the query parameters
+        if limit is not None:
+            
+            _query_params.append(('limit', limit))
+            
+        if cursor is not None:
+            
+            _query_params.append(('cursor', cursor))
+            
+        if fields is not None:
+            
+            _query_params.append(('fields', fields))
+            
         # process the header parameters
         # process the form parameters
         # process the body parameter
@@ -16,8 +16,9 @@ from pydantic import validate_call, Field, StrictFloat, StrictStr, StrictInt
 from typing import Any, Dict, List, Optional, Tuple, Union
 from typing_extensions import Annotated
 
-from pydantic import StrictInt
+from pydantic import Field, StrictInt, StrictStr
 from typing import List, Optional
+from typing_extensions import Annotated
 from openapi_client.models.flight_create import FlightCreate
 from openapi_client.models.flight_response import FlightResponse
 
@@ -578,6 +579,7 @@ class FlightsApi:
     def get_flight_details_flights_flight_id_get(
         self,
         flight_id: StrictInt,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -596,6 +598,8 @@ class FlightsApi:
 
         :param flight_id: (required)
         :type flight_id: int
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -620,6 +624,7 @@ class FlightsApi:
 
         _param = self._get_flight_details_flights_flight_id_get_serialize(
             flight_id=flight_id,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -645,6 +650,7 @@ class FlightsApi:
     def get_flight_details_flights_flight_id_get_with_http_info(
         self,
         flight_id: StrictInt,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -663,6 +669,8 @@ class FlightsApi:
 
         :param flight_id: (required)
         :type flight_id: int
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -687,6 +695,7 @@ class FlightsApi:
 
         _param = self._get_flight_details_flights_flight_id_get_serialize(
             flight_id=flight_id,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -712,6 +721,7 @@ class FlightsApi:
     def get_flight_details_flights_flight_id_get_without_preload_content(
         self,
         flight_id: StrictInt,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -730,6 +740,8 @@ class FlightsApi:
 
         :param flight_id: (required)
         :type flight_id: int
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -754,6 +766,7 @@ class FlightsApi:
 
         _param = self._get_flight_details_flights_flight_id_get_serialize(
             flight_id=flight_id,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -774,6 +787,7 @@ class FlightsApi:
     def _get_flight_details_flights_flight_id_get_serialize(
         self,
         flight_id,
+        fields,
         _request_auth,
         _content_type,
         _headers,
@@ -798,6 +812,10 @@ class FlightsApi:
         if flight_id is not None:
             _path_params['flight_id'] = flight_id
         # process the query parameters
+        if fields is not None:
+            
+            _query_params.append(('fields', fields))
+            
         # process the header parameters
         # process the form parameters
         # process the body parameter
@@ -837,8 +855,10 @@ class FlightsApi:
     @validate_call
     def list_flights_flights_get(
         self,
-        skip: Optional[StrictInt] = None,
-        limit: Optional[StrictInt] = None,
+        skip: Optional[Annotated[int, Field(strict=True, ge=0)]] = None,
+        limit: Optional[Annotated[int, Field(le=500, strict=True, ge=1)]] = None,
+        cursor: Optional[StrictStr] = None,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -854,11 +874,16 @@ class FlightsApi:
     ) -> List[FlightResponse]:
         """List Flights
 
+        List flights by departure time. Follow the `X-Next-Cursor` response header with `cursor=` to page through; `skip` is kept for old clients.
 
         :param skip:
         :type skip: int
         :param limit:
         :type limit: int
+        :param cursor:
+        :type cursor: str
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -884,6 +909,8 @@ class FlightsApi:
         _param = self._list_flights_flights_get_serialize(
             skip=skip,
             limit=limit,
+            cursor=cursor,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -908,8 +935,10 @@ class FlightsApi:
     @validate_call
     def list_flights_flights_get_with_http_info(
         self,
-        skip: Optional[StrictInt] = None,
-        limit: Optional[StrictInt] = None,
+        skip: Optional[Annotated[int, Field(strict=True, ge=0)]] = None,
+        limit: Optional[Annotated[int, Field(le=500, strict=True, ge=1)]] = None,
+        cursor: Optional[StrictStr] = None,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -925,11 +954,16 @@ class FlightsApi:
     ) -> ApiResponse[List[FlightResponse]]:
         """List Flights
 
+        List flights by departure time. Follow the `X-Next-Cursor` response header with `cursor=` to page through; `skip` is kept for old clients.
 
         :param skip:
         :type skip: int
         :param limit:
         :type limit: int
+        :param cursor:
+        :type cursor: str
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -955,6 +989,8 @@ class FlightsApi:
         _param = self._list_flights_flights_get_serialize(
             skip=skip,
             limit=limit,
+            cursor=cursor,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -979,8 +1015,10 @@ class FlightsApi:
     @validate_call
     def list_flights_flights_get_without_preload_content(
         self,
-        skip: Optional[StrictInt] = None,
-        limit: Optional[StrictInt] = None,
+        skip: Optional[Annotated[int, Field(strict=True, ge=0)]] = None,
+        limit: Optional[Annotated[int, Field(le=500, strict=True, ge=1)]] = None,
+        cursor: Optional[StrictStr] = None,
+        fields: Annotated[Optional[StrictStr], Field(description="Comma-separated fields to return, e.g. `id,flight_number,available_seats`.")] = None,
         _request_timeout: Union[
             None,
             Annotated[StrictFloat, Field(gt=0)],
@@ -996,11 +1034,16 @@ class FlightsApi:
     ) -> RESTResponseType:
         """List Flights
 
+        List flights by departure time. Follow the `X-Next-Cursor` response header with `cursor=` to page through; `skip` is kept for old clients.
 
         :param skip:
         :type skip: int
         :param limit:
         :type limit: int
+        :param cursor:
+        :type cursor: str
+        :param fields: Comma-separated fields to return, e.g. `id,flight_number,available_seats`.
+        :type fields: str
         :param _request_timeout: timeout setting for this request. If one
                                  number provided, it will be total request
                                  timeout. It can also be a pair (tuple) of
@@ -1026,6 +1069,8 @@ class FlightsApi:
         _param = self._list_flights_flights_get_serialize(
             skip=skip,
             limit=limit,
+            cursor=cursor,
+            fields=fields,
             _request_auth=_request_auth,
             _content_type=_content_type,
             _headers=_headers,
@@ -1047,6 +1092,8 @@ class FlightsApi:
         self,
         skip,
         limit,
+        cursor,
+        fields,
         _request_auth,
         _content_type,
         _headers,
@@ -1077,6 +1124,14 @@ class FlightsApi:
             
             _query_params.append(('limit', limit))
             
+        if cursor is not None:
+            
+            _query_params.append(('cursor', cursor))
+            
+        if fields is not None:
+            
+            _query_params.append(('fields', fields))
+            
         # process the header parameters
         # process the form parameters
         # process the body parameter
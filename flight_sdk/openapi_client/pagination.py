@@ -0,0 +1,59 @@
+# coding: utf-8
+
+"""
+    Flight Booking API
+
+    Helpers that follow the `X-Next-Cursor` header of paginated endpoints.
+
+    This module is maintained by hand and listed in .openapi-generator-ignore,
+    so regenerating the client keeps it.
+"""  # noqa: E501
+
+from typing import Any, Callable, Iterator, Mapping, Optional
+
+from openapi_client.api.bookings_api import BookingsApi
+from openapi_client.api.flights_api import FlightsApi
+from openapi_client.api_response import ApiResponse
+from openapi_client.models.booking_response import BookingResponse
+from openapi_client.models.flight_response import FlightResponse
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _next_cursor(headers: Optional[Mapping[str, str]]) -> Optional[str]:
+    # ApiResponse copies headers into a plain dict, so match names by hand
+    for name, value in (headers or {}).items():
+        if name.lower() == NEXT_CURSOR_HEADER.lower():
+            return value
+    return None
+
+
+def follow_cursor(
+    fetch_page: Callable[..., ApiResponse],
+    page_size: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[Any]:
+    """Yield every item of a cursor-paginated `*_with_http_info` call.
+
+    :param fetch_page: a generated `*_with_http_info` method that accepts
+                       `limit` and `cursor`.
+    :param page_size: items per request; the server default when omitted.
+    :param kwargs: any other arguments for `fetch_page`.
+    """
+    cursor = None
+    while True:
+        response = fetch_page(limit=page_size, cursor=cursor, **kwargs)
+        yield from response.data or []
+        cursor = _next_cursor(response.headers)
+        if not cursor:
+            return
+
+
+def iter_flights(api: FlightsApi, page_size: Optional[int] = None, **kwargs: Any) -> Iterator[FlightResponse]:
+    """Yield every flight, in departure order, one page at a time."""
+    return follow_cursor(api.list_flights_flights_get_with_http_info, page_size, **kwargs)
+
+
+def iter_my_bookings(api: BookingsApi, page_size: Optional[int] = None, **kwargs: Any) -> Iterator[BookingResponse]:
+    """Yield every booking of the authenticated user, one page at a time."""
+    return follow_cursor(api.get_my_bookings_bookings_me_get_with_http_info, page_size, **kwargs)
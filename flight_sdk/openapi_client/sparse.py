@@ -0,0 +1,126 @@
+# coding: utf-8
+
+"""
+    Flight Booking API
+
+    Partial models for responses requested with `fields=`.
+
+    This module is maintained by hand and listed in .openapi-generator-ignore,
+    so regenerating the client keeps it.
+"""  # noqa: E501
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type, Union
+
+from pydantic import BaseModel, ConfigDict, StrictInt, StrictStr
+from typing_extensions import Self
+
+from openapi_client import rest
+from openapi_client.api.bookings_api import BookingsApi
+from openapi_client.api.flights_api import FlightsApi
+from openapi_client.api_response import ApiResponse
+from openapi_client.models.flight_response import FlightResponse
+
+
+class PartialModel(BaseModel):
+    """Base of the partial models: every field is optional and only the
+    fields the server returned are set (see `model_fields_set`)."""
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        validate_assignment=True,
+        protected_namespaces=(),
+    )
+
+    @classmethod
+    def from_dict(cls, obj: Optional[Dict[str, Any]]) -> Optional[Self]:
+        if obj is None:
+            return None
+        return cls.model_validate({name: value for name, value in obj.items() if name in cls.model_fields})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Only the fields that were returned."""
+        return self.model_dump(by_alias=True, exclude_unset=True)
+
+
+class PartialFlightResponse(PartialModel):
+    """A FlightResponse with only the requested fields."""
+    flight_number: Optional[StrictStr] = None
+    airline: Optional[StrictStr] = None
+    departure: Optional[StrictStr] = None
+    destination: Optional[StrictStr] = None
+    departure_time: Optional[datetime] = None
+    arrival_time: Optional[datetime] = None
+    total_seats: Optional[StrictInt] = None
+    id: Optional[StrictInt] = None
+    available_seats: Optional[StrictInt] = None
+
+
+class PartialBookingResponse(PartialModel):
+    """A BookingResponse with only the requested fields. A requested
+    `flight` is always the full flight."""
+    passenger_name: Optional[StrictStr] = None
+    passport_number: Optional[StrictStr] = None
+    id: Optional[StrictInt] = None
+    flight_id: Optional[StrictInt] = None
+    status: Optional[StrictStr] = None
+    user_id: Optional[StrictInt] = None
+    flight: Optional[FlightResponse] = None
+
+    @classmethod
+    def from_dict(cls, obj: Optional[Dict[str, Any]]) -> Optional[Self]:
+        if obj is not None and obj.get("flight") is not None:
+            obj = {**obj, "flight": FlightResponse.from_dict(obj["flight"])}
+        return super().from_dict(obj)
+
+
+def with_fields(
+    fetch: Callable[..., rest.RESTResponseType],
+    model: Type[PartialModel],
+    fields: Sequence[str],
+) -> Callable[..., ApiResponse]:
+    """Wrap a generated `*_without_preload_content` method so it sends
+    `fields=` and parses the response into `model` instances.
+
+    The wrapper returns an ApiResponse like the `*_with_http_info` methods,
+    so it also works with `pagination.follow_cursor`:
+
+        fetch = with_fields(api.list_flights_flights_get_without_preload_content,
+                            PartialFlightResponse, ["id", "available_seats"])
+        for flight in follow_cursor(fetch, page_size=100): ...
+
+    :param fetch: a generated `*_without_preload_content` method.
+    :param model: the partial model of the endpoint's items.
+    :param fields: names of the fields to request.
+    """
+    api_client = fetch.__self__.api_client
+
+    def fetch_fields(*args: Any, **kwargs: Any) -> ApiResponse:
+        response = rest.RESTResponse(fetch(*args, fields=",".join(fields), **kwargs))
+        response.read()
+        # Non-2xx responses raise the usual ApiException subclasses here
+        raw = api_client.response_deserialize(response, {"2XX": "object"})
+        data: Union[PartialModel, List[PartialModel], None]
+        if isinstance(raw.data, list):
+            data = [model.from_dict(item) for item in raw.data]
+        else:
+            data = model.from_dict(raw.data)
+        return ApiResponse(status_code=raw.status_code, headers=raw.headers, data=data, raw_data=raw.raw_data)
+
+    return fetch_fields
+
+
+def list_flights(api: FlightsApi, fields: Sequence[str], **kwargs: Any) -> List[PartialFlightResponse]:
+    """One page of `GET /flights/` with only `fields`."""
+    return with_fields(api.list_flights_flights_get_without_preload_content, PartialFlightResponse, fields)(**kwargs).data
+
+
+def get_flight_details(api: FlightsApi, flight_id: int, fields: Sequence[str], **kwargs: Any) -> PartialFlightResponse:
+    """`GET /flights/{flight_id}` with only `fields`."""
+    fetch = with_fields(api.get_flight_details_flights_flight_id_get_without_preload_content, PartialFlightResponse, fields)
+    return fetch(flight_id, **kwargs).data
+
+
+def get_my_bookings(api: BookingsApi, fields: Sequence[str], **kwargs: Any) -> List[PartialBookingResponse]:
+    """One page of `GET /bookings/me` with only `fields`."""
+    return with_fields(api.get_my_bookings_bookings_me_get_without_preload_content, PartialBookingResponse, fields)(**kwargs).data
@@ -33,6 +33,13 @@ class TestBookingsApi(unittest.TestCase):
         """
         pass
 
+    def test_book_tickets_batch_flights_flight_id_book_batch_post(self) -> None:
+        """Test case for book_tickets_batch_flights_flight_id_book_batch_post
+
+        Book Tickets Batch
+        """
+        pass
+
     def test_cancel_booking_bookings_booking_id_delete(self) -> None:
         """Test case for cancel_booking_bookings_booking_id_delete
 
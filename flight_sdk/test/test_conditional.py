@@ -0,0 +1,70 @@
+# coding: utf-8
+
+"""
+    Flight Booking API
+
+    Tests for the hand-written conditional-request client.
+"""  # noqa: E501
+
+
+import json
+import unittest
+from types import SimpleNamespace
+
+from openapi_client import rest
+from openapi_client.api.flights_api import FlightsApi
+from openapi_client.conditional import CachingApiClient
+
+
+FLIGHT = {
+    "flight_number": "LH456", "airline": "Lufthansa", "departure": "FRA", "destination": "LAX",
+    "departure_time": "2030-01-01T08:00:00", "arrival_time": "2030-01-01T11:00:00",
+    "total_seats": 5, "id": 1, "available_seats": 5,
+}
+
+
+class FakeRestClient:
+    """Answers 304 whenever the request's If-None-Match matches the current ETag."""
+
+    def __init__(self) -> None:
+        self.etag = '"v1"'
+        self.requests = []
+
+    def request(self, method, url, headers=None, body=None, post_params=None, _request_timeout=None):
+        self.requests.append(headers or {})
+        if (headers or {}).get("If-None-Match") == self.etag:
+            status, reason, data = 304, "Not Modified", b""
+        else:
+            status, reason, data = 200, "OK", json.dumps(FLIGHT).encode()
+        response_headers = {"ETag": self.etag, "content-type": "application/json"}
+        return rest.RESTResponse(SimpleNamespace(status=status, reason=reason, data=data, headers=response_headers))
+
+
+class TestConditional(unittest.TestCase):
+    """Conditional-request cache tests"""
+
+    def setUp(self) -> None:
+        self.client = CachingApiClient()
+        self.rest = FakeRestClient()
+        self.client.rest_client = self.rest
+        self.api = FlightsApi(self.client)
+
+    def test_304_is_served_from_cache(self) -> None:
+        first = self.api.get_flight_details_flights_flight_id_get(1)
+        second = self.api.get_flight_details_flights_flight_id_get(1)
+        self.assertEqual(first, second)
+        self.assertNotIn("If-None-Match", self.rest.requests[0])
+        self.assertEqual(self.rest.requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(self.client.not_modified_count, 1)
+
+    def test_changed_resource_is_refetched(self) -> None:
+        self.api.get_flight_details_flights_flight_id_get(1)
+        self.rest.etag = '"v2"'
+        self.api.get_flight_details_flights_flight_id_get(1)
+        self.assertEqual(self.client.not_modified_count, 0)
+        self.api.get_flight_details_flights_flight_id_get(1)
+        self.assertEqual(self.client.not_modified_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+# coding: utf-8
+
+"""
+    Flight Booking API
+
+    Tests for the hand-written cursor pagination helpers.
+"""  # noqa: E501
+
+
+import unittest
+
+from openapi_client.api_response import ApiResponse
+from openapi_client.pagination import follow_cursor
+
+
+class TestPagination(unittest.TestCase):
+    """Cursor pagination helper tests"""
+
+    def test_follow_cursor_walks_every_page(self) -> None:
+        pages = {
+            None: ([1, 2], {"X-Next-Cursor": "c1"}),
+            "c1": ([3, 4], {"x-next-cursor": "c2"}),
+            "c2": ([5], {}),
+        }
+        calls = []
+
+        def fetch_page(limit=None, cursor=None):
+            calls.append((limit, cursor))
+            data, headers = pages[cursor]
+            return ApiResponse(status_code=200, headers=headers, data=data, raw_data=b"")
+
+        self.assertEqual(list(follow_cursor(fetch_page, page_size=2)), [1, 2, 3, 4, 5])
+        self.assertEqual(calls, [(2, None), (2, "c1"), (2, "c2")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# coding: utf-8
+
+"""
+    Flight Booking API
+
+    Tests for the hand-written sparse fieldset helpers.
+"""  # noqa: E501
+
+
+import json
+import unittest
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from openapi_client import rest
+from openapi_client.api.bookings_api import BookingsApi
+from openapi_client.api.flights_api import FlightsApi
+from openapi_client.api_client import ApiClient
+from openapi_client.exceptions import BadRequestException
+from openapi_client.pagination import follow_cursor
+from openapi_client import sparse
+
+
+FLIGHT = {
+    "flight_number": "LH456", "airline": "Lufthansa", "departure": "FRA", "destination": "LAX",
+    "departure_time": "2030-01-01T08:00:00", "arrival_time": "2030-01-01T11:00:00",
+    "total_seats": 5, "id": 1, "available_seats": 5,
+}
+
+
+class FakeRestClient:
+    """Serves the requested fields of FLIGHT, or of two bookings on it."""
+
+    def __init__(self) -> None:
+        self.urls = []
+
+    def request(self, method, url, headers=None, body=None, post_params=None, _request_timeout=None):
+        self.urls.append(url)
+        query = parse_qs(urlparse(url).query)
+        fields = query["fields"][0].split(",")
+        status, headers = 200, {"content-type": "application/json"}
+        if "password" in fields:
+            status, data = 400, {"detail": "Unknown fields ['password']"}
+        elif "/bookings/" in url:
+            bookings = [{"id": i, "status": "Booked", "flight": FLIGHT} for i in (1, 2)]
+            if "cursor" in query:
+                bookings = bookings[1:]
+            else:
+                bookings, headers["X-Next-Cursor"] = bookings[:1], "after-1"
+            data = [{name: b[name] for name in fields} for b in bookings]
+        elif url.split("?")[0].endswith("/flights/"):
+            data = [{name: FLIGHT[name] for name in fields}]
+        else:
+            data = {name: FLIGHT[name] for name in fields}
+        return rest.RESTResponse(SimpleNamespace(
+            status=status, reason="OK", data=json.dumps(data).encode(), headers=headers
+        ))
+
+
+class TestSparse(unittest.TestCase):
+    """Sparse fieldset tests"""
+
+    def setUp(self) -> None:
+        self.client = ApiClient()
+        self.rest = FakeRestClient()
+        self.client.rest_client = self.rest
+
+    def test_partial_flights(self) -> None:
+        flights = sparse.list_flights(FlightsApi(self.client), ["id", "available_seats"], limit=10)
+        self.assertIn("fields=id%2Cavailable_seats", self.rest.urls[0])
+        self.assertEqual(flights[0].id, 1)
+        self.assertEqual(flights[0].available_seats, 5)
+        self.assertIsNone(flights[0].flight_number)
+        self.assertEqual(flights[0].to_dict(), {"id": 1, "available_seats": 5})
+
+        flight = sparse.get_flight_details(FlightsApi(self.client), 1, ["departure_time"])
+        self.assertEqual(flight.departure_time.hour, 8)
+
+    def test_partial_bookings_follow_cursor(self) -> None:
+        fetch = sparse.with_fields(
+            BookingsApi(self.client).get_my_bookings_bookings_me_get_without_preload_content,
+            sparse.PartialBookingResponse, ["id", "flight"],
+        )
+        bookings = list(follow_cursor(fetch, page_size=1))
+        self.assertEqual([b.id for b in bookings], [1, 2])
+        self.assertEqual(bookings[0].flight.flight_number, "LH456")
+        self.assertIsNone(bookings[0].status)
+
+    def test_unknown_field_raises(self) -> None:
+        with self.assertRaises(BadRequestException):
+            sparse.list_flights(FlightsApi(self.client), ["password"])
+
+
+if __name__ == '__main__':
+    unittest.main()